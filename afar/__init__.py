@@ -13,16 +13,49 @@ or to use an IPython magic:
 Read the documentation at https://github.com/eriknw/afar
 """
 
-from . import _utils
-from ._core import get, run  # noqa
-from ._version import get_versions
-from ._where import later, locally, remotely  # noqa
+import sys
 
-__version__ = get_versions()["version"]
-del get_versions
+from . import _utils
 
+# Import lazily, because dask.distributed is slow to import and isn't needed for
+# `locally` or `later`, or until a `remotely` context needs a client.
+_lazy_imports = {
+    "LRUData": "._data",
+    "get": "._core",
+    "later": "._where",
+    "locally": "._where",
+    "preload": "._preload",
+    "progress": "._progress",
+    "remotely": "._where",
+    "run": "._core",
+    "stats": "._stats",
+    "trace": "._trace",
+}
 if _utils.is_ipython():
-    from ._magic import new_magic  # noqa
+    _lazy_imports["new_magic"] = "._magic"
+
+if "distributed" in sys.modules:
+    # Workers (and clients already using dask.distributed) need to deserialize MagicFunction
+    from . import _serialize  # noqa (registers how to serialize MagicFunction)
+
+
+def __getattr__(name):
+    if name in _lazy_imports:
+        from importlib import import_module
+
+        val = getattr(import_module(_lazy_imports[name], __name__), name)
+    elif name == "__version__":
+        from ._version import get_versions
+
+        val = get_versions()["version"]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = val
+    return val
+
+
+def __dir__():
+    return sorted(globals().keys() | _lazy_imports.keys() | {"__version__"})
 
 
 def load_ipython_extension(ip):
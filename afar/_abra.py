@@ -4,9 +4,8 @@ This callable object is able to provide the values of the requested argument
 names and return the final expression so it can be displayed.
 """
 import dis
-from types import FunctionType
+from types import CodeType, FunctionType
 
-from dask.distributed import Future
 from innerscope import scoped_function
 
 from ._reprs import get_repr_methods
@@ -58,7 +57,34 @@ def create_func(source, globals_dict, is_in_ipython):
     return func, display_expr
 
 
+def stored_names(func):
+    """Names assigned to in the body of func in the order they are assigned"""
+    return [
+        inst.argval
+        for inst in dis.get_instructions(func)
+        if inst.opname in {"STORE_NAME", "STORE_FAST", "STORE_DEREF", "STORE_GLOBAL"}
+    ]
+
+
+def imported_modules(func):
+    """Names of modules imported (absolutely) in the body of func, including nested code"""
+    modules = []
+    codes = [func.__code__]
+    while codes:
+        code = codes.pop()
+        instructions = list(dis.get_instructions(code))
+        for i, inst in enumerate(instructions):
+            # The level of the import is loaded two instructions earlier
+            if inst.opname == "IMPORT_NAME" and i > 1 and instructions[i - 2].argval == 0:
+                if inst.argval not in modules:
+                    modules.append(inst.argval)
+        codes.extend(const for const in code.co_consts if isinstance(const, CodeType))
+    return modules
+
+
 class MagicFunction:
+    __slots__ = ("_source", "_scoped", "_display_expr", "_repr_methods")
+
     def __init__(self, source, scoped, display_expr):
         self._source = source
         self._scoped = scoped
@@ -71,17 +97,23 @@ class MagicFunction:
     def __call__(self):
         return self._scoped()
 
+    def _bind(self, values):
+        """Copy with some values of the outer scope replaced, such as to send them differently"""
+        rv = MagicFunction.__new__(MagicFunction)
+        rv._source = self._source
+        rv._display_expr = self._display_expr
+        rv._repr_methods = self._repr_methods
+        rv._scoped = self._scoped.bind(values)
+        return rv
+
     def __getstate__(self):
         # Instead of trying to serialize the function we created with `compile` and `exec`,
         # let's save the source and recreate the function (and self._scoped) again.
-        state = dict(self.__dict__)
-        del state["_scoped"]
-        state["outer_scope"] = self._scoped.outer_scope
-        return state
+        # This is pickled for every submission, so keep it to a small tuple.
+        return self._source, self._display_expr, self._repr_methods, self._scoped.outer_scope
 
     def __setstate__(self, state):
-        outer_scope = state.pop("outer_scope")
-        self.__dict__.update(state)
+        self._source, self._display_expr, self._repr_methods, outer_scope = state
         func, _ = create_func(self._source, {}, self._display_expr)
         self._scoped = scoped_function(func, outer_scope)
 
@@ -94,18 +126,26 @@ def cadabra(context_body, where, names, data, global_ns, local_ns):
 
     # If no variable names were given, only get the last assignment
     if not names:
-        for inst in list(dis.get_instructions(func)):
-            if inst.opname in {"STORE_NAME", "STORE_FAST", "STORE_DEREF", "STORE_GLOBAL"}:
-                names = (inst.argval,)
+        stored = stored_names(func)
+        if stored:
+            names = (stored[-1],)
 
     # Use innerscope!  We only keep the globals, locals, and closures we need.
-    scoped = scoped_function(func, data)
+    scoped = scoped_function(func)
+    # Only look up the names we use, because `data` may be large (such as `globals()`)
+    # or track which items are used (such as `LRUData`).
+    needed = scoped.missing | scoped.outer_scope.keys() | scoped.builtin_names
+    update = {key: data[key] for key in needed if key in data}
+    if update:
+        scoped = scoped.bind(update)
     if scoped.missing:
         # Gather the necessary closures and locals
         update = {key: local_ns[key] for key in scoped.missing if key in local_ns}
         scoped = scoped.bind(update)
 
     if where == "remotely":
+        from dask.distributed import Future
+
         # Get ready to submit to dask.distributed by separating the Futures.
         futures = {
             key: val
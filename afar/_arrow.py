@@ -0,0 +1,73 @@
+"""Send pandas DataFrames and Arrow tables as Arrow IPC streams with ``remotely(arrow=True)``.
+
+Converting a wide DataFrame to Arrow and back is often much faster than pickling it.
+Values are converted locally to ``ArrowData``, whose IPC buffer is pickled out-of-band,
+and converted back on a worker.  Values that Arrow can't represent are sent as usual.
+"""
+import pickle
+import sys
+
+
+class ArrowData:
+    """A DataFrame or Arrow Table as an Arrow IPC stream; use ``unpack`` to get the value"""
+
+    __slots__ = ("buffer", "kind")
+
+    def __init__(self, buffer, kind):
+        self.buffer = buffer
+        self.kind = kind
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5 and hasattr(pickle, "PickleBuffer"):  # Python >= 3.8
+            return type(self), (pickle.PickleBuffer(self.buffer), self.kind)
+        return type(self), (bytes(memoryview(self.buffer)), self.kind)
+
+    @property
+    def nbytes(self):
+        return memoryview(self.buffer).nbytes
+
+    def unpack(self):
+        import pyarrow as pa
+
+        table = pa.ipc.open_stream(pa.py_buffer(self.buffer)).read_all()
+        if self.kind == "pandas":
+            return table.to_pandas()
+        return table
+
+
+def to_arrow(val):
+    """Convert a pandas DataFrame or Arrow Table to ``ArrowData``.
+
+    Returns None if val isn't one of these or can't be converted.
+    """
+    pd = sys.modules.get("pandas")
+    if pd is not None and type(val) is pd.DataFrame:
+        kind = "pandas"
+    elif type(val).__module__.startswith("pyarrow") and type(val).__name__ == "Table":
+        kind = "arrow"
+    else:
+        return None
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("remotely(arrow=True) requires pyarrow to be installed") from None
+    try:
+        table = pa.Table.from_pandas(val) if kind == "pandas" else val
+    except (pa.ArrowException, TypeError, ValueError):
+        return None
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return ArrowData(sink.getvalue(), kind)
+
+
+def scope_to_arrow(magic_func):
+    """Copy magic_func with DataFrames in its outer scope replaced by ``ArrowData``"""
+    converted = {}
+    for key, val in magic_func._scoped.outer_scope.items():
+        arrow_data = to_arrow(val)
+        if arrow_data is not None:
+            converted[key] = arrow_data
+    if not converted:
+        return magic_func
+    return magic_func._bind(converted)
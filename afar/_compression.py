@@ -0,0 +1,85 @@
+"""Compress values before sending them to the cluster with ``remotely(compression=...)``.
+
+Values are serialized and compressed locally and wrapped in ``Compressed``, which is
+sent as-is and unpacked on a worker.  This is independent of the compression that
+dask may use for communication, which is configured globally.
+"""
+from dask.distributed.protocol import (
+    dask_deserialize,
+    dask_serialize,
+    deserialize,
+    serialize,
+)
+from dask.distributed.protocol.compression import compressions, maybe_compress
+
+
+def check_compression(compression):
+    if compression is not None and compression not in compressions:
+        available = ", ".join(repr(key) for key in compressions if isinstance(key, str))
+        raise ValueError(
+            f"Compression {compression!r} is not available.  Available compressions: "
+            f"{available}.  Other compressions may be available if their library "
+            "(such as lz4 or zstandard) is installed."
+        )
+
+
+def _get_decompress(compression):
+    # A dict in older versions of distributed and a NamedTuple in newer versions
+    funcs = compressions[compression]
+    if isinstance(funcs, dict):
+        return funcs["decompress"]
+    return funcs.decompress
+
+
+class Compressed:
+    """A serialized value with compressed frames; use ``unpack`` to get the value"""
+
+    __slots__ = ("header", "frames", "compression")
+
+    def __init__(self, header, frames, compression):
+        self.header = header
+        self.frames = frames
+        self.compression = compression
+
+    @property
+    def nbytes(self):
+        return sum(len(frame) for frame in self.frames)
+
+    def unpack(self):
+        frames = [
+            _get_decompress(compression)(frame)
+            for compression, frame in zip(self.compression, self.frames)
+        ]
+        return deserialize(self.header, frames)
+
+
+def compress(value, compression, min_bytes):
+    """Serialize and compress value if it is large and compressible.
+
+    Returns a ``Compressed`` object, or the original value if compressing doesn't help.
+    """
+    header, frames = serialize(value, on_error="raise")
+    frames = [memoryview(frame).cast("B") for frame in frames]
+    if sum(len(frame) for frame in frames) < min_bytes:
+        return value
+    compressed_frames = []
+    compressions_used = []
+    for frame in frames:
+        # Skips small frames and frames that don't compress well
+        used, frame = maybe_compress(frame, min_size=min_bytes, compression=compression)
+        compressed_frames.append(frame)
+        compressions_used.append(used)
+    if all(used is None for used in compressions_used):
+        return value
+    return Compressed(header, compressed_frames, compressions_used)
+
+
+@dask_serialize.register(Compressed)
+def serialize_compressed(compressed):
+    header = {"header": compressed.header, "compression": compressed.compression}
+    return header, compressed.frames
+
+
+@dask_deserialize.register(Compressed)
+def deserialize_compressed(header, frames):
+    return Compressed(header["header"], frames, list(header["compression"]))
@@ -1,45 +1,93 @@
 """Define the user-facing `run` object; this is where it all comes together."""
 import dis
 import sys
+import time
+import warnings
+from contextlib import nullcontext
+from functools import partial
 from inspect import currentframe
 from uuid import uuid4
-from weakref import WeakKeyDictionary, WeakSet
+from weakref import WeakKeyDictionary, WeakSet, WeakValueDictionary, ref
 
-from dask import distributed
-from dask.distributed import get_worker
-
-from ._abra import cadabra
-from ._inspect import get_body, get_body_start, get_lines
+from ._abra import cadabra, imported_modules
+from ._arrow import ArrowData, scope_to_arrow, to_arrow
+from ._inspect import get_body, get_body_start, get_lines, get_source_label
+from ._logging import LogRecorder, handle_records
 from ._printing import PrintRecorder
-from ._reprs import display_repr, repr_afar
+from ._profile import format_stats, load_stats, profile_call
+from ._progress import Progress, ProgressReporter
+from ._reprs import RETURN_VALUE_KEY, FullRepr, display_repr, repr_afar
+from ._stats import ContextStats, timer
 from ._utils import supports_async_output
-from ._where import find_where
+from ._where import Where, find_where
 
 
 class Run:
+    __slots__ = (
+        "names",
+        "data",
+        "client",
+        "liveness",
+        "context_body",
+        "stats",
+        "_is_singleton",
+        "_frame",
+        "_client_to_futures",
+        "_delta_cache",
+        "_data_owner",
+        "_where",
+        "_magic_func",
+        "_futures",
+        "_body_start",
+        "_lines",
+        "_location",
+        "_progress",
+        "_full_repr",
+        "_entering_stats",
+    )
     _gather_data = False
     # Used to update outputs asynchronously
     _outputs = {}
+    # Weak reference to the client and values for `remotely(lazy=True)` that workers may request
+    _lazy_values = {}
+    # Futures of results that afar saved in `data`, so `liveness="report"` only reports these
+    _saved_futures = WeakSet()
     _channel = "afar-" + uuid4().hex
 
-    def __init__(self, *names, client=None, data=None):
+    def __init__(self, *names, client=None, data=None, liveness=None):
+        if liveness not in {None, "report"}:
+            raise ValueError(f'liveness argument must be None or "report"; got {liveness!r}')
         self.names = names
         self.data = data
         self.client = client
+        # Whether to report when a context replaces Futures saved by an earlier context
+        self.liveness = liveness
         self.context_body = None
         # afar.run can be used as a singleton without calling it.
         # If we do this, we shouldn't keep data around.
         self._is_singleton = data is None
         self._frame = None
-        # Used to cancel work
-        self._client_to_futures = WeakKeyDictionary()
+        # Used to cancel work; created when first needed
+        self._client_to_futures = None
+        # Checksums of scattered arrays for delta transfer; created when first needed
+        self._delta_cache = None
+        # Run whose data we share (such as from `run("x")`), so it keeps the delta cache
+        self._data_owner = None
         # For now, save the following to help debug
         self._where = None
         self._magic_func = None
+        # Weak references to the input Futures of the most recent context
+        self._futures = None
         self._body_start = None
         self._lines = None
-
-    def __call__(self, *names, client=None, data=None):
+        self._location = None
+        self._progress = None
+        self._full_repr = None
+        # Timings of the most recent context
+        self.stats = None
+        self._entering_stats = None
+
+    def __call__(self, *names, client=None, data=None, liveness=None):
         if data is None:
             if self.data is None:
                 data = {}
@@ -47,24 +95,30 @@ class Run:
                 data = self.data
         if client is None:
             client = self.client
-        return type(self)(*names, client=client, data=data)
+        if liveness is None:
+            liveness = self.liveness
+        rv = type(self)(*names, client=client, data=data, liveness=liveness)
+        if data is self.data:
+            rv._data_owner = self if self._data_owner is None else self._data_owner
+        return rv
 
     def __enter__(self):
         self._frame = currentframe().f_back
         with_lineno = self._frame.f_lineno - 1
-        if self._is_singleton:
-            if self.data:
-                raise RuntimeError("uh oh!")
-            self.data = {}
+        if self._is_singleton and self.data:
+            raise RuntimeError("uh oh!")
 
-        lines = get_lines(self._frame)
+        self._entering_stats = stats = ContextStats()
+        with stats.timer("get_lines"):
+            lines = get_lines(self._frame)
 
         while not lines[with_lineno].lstrip().startswith("with"):
             with_lineno -= 1
             if with_lineno < 0:
                 raise RuntimeError("Failed to analyze the context!")
 
-        num_with, body_start = get_body_start(lines, with_lineno)
+        with stats.timer("get_body_start"):
+            num_with, body_start = get_body_start(lines, with_lineno)
         if num_with < 2:
             # Best effort detection.  This fails if there is a context *before* afar.run
             within = type(self).__name__.lower()
@@ -76,6 +130,10 @@ class Run:
             )
         self._body_start = body_start
         self._lines = lines
+        self._location = (self._frame.f_code.co_filename, with_lineno + 1)
+        if self._is_singleton:
+            # Set after analyzing so a failure doesn't leave data behind on the singleton
+            self.data = {}
         return self.data
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
@@ -119,7 +177,8 @@ class Run:
         else:
             endline = maxline + 5  # give us some wiggle room
 
-        context_body = get_body(self._lines[self._body_start : endline])
+        with self._entering_stats.timer("get_body"):
+            context_body = get_body(self._lines[self._body_start : endline])
         self._run(
             where.where,
             context_body,
@@ -127,8 +186,10 @@ class Run:
             self.data,
             client=self.client or where.client,
             submit_kwargs=where.submit_kwargs,
+            options=where.options,
             global_ns=frame.f_globals,
             local_ns=frame.f_locals,
+            location=self._location,
         )
         return True
 
@@ -143,20 +204,48 @@ class Run:
         local_ns,
         client=None,
         submit_kwargs=None,
+        options=None,
         return_expr=False,
+        location=None,
     ):
         self._where = where
         self.context_body = context_body
         if submit_kwargs is None:
             submit_kwargs = {}
+        if options is None:
+            options = Where.default_options
+        if self._entering_stats is not None:
+            stats = self._entering_stats
+            self._entering_stats = None
+        else:
+            stats = ContextStats()
+        stats.where = where
+        self.stats = stats
 
-        self._magic_func, names, futures = cadabra(
-            context_body, where, names, data, global_ns, local_ns
-        )
+        with stats.timer("cadabra"):
+            self._magic_func, names, futures = cadabra(
+                context_body, where, names, data, global_ns, local_ns
+            )
         display_expr = self._magic_func._display_expr
         return_future = None
+        replaced = None
+        self._futures = None
 
         if where == "remotely":
+            # dask.distributed is slow to import, so only import it when we need a client
+            import dask
+            from dask import distributed
+            from dask.distributed import Future
+
+            from . import _serialize  # noqa (registers how to serialize MagicFunction)
+            from ._compression import Compressed, compress
+            from ._data import LRUData
+            from ._delta import DeltaCache
+            from ._lazy import make_lazy
+            from ._preload import preload
+            from ._shared_memory import is_same_host, remove_files, share_arrays
+            from ._upload import upload_modules
+
             if client is None:
                 client = distributed.client._get_global_client()
                 if client is None:
@@ -164,11 +253,23 @@ class Run:
                         "No dask.distributed client found.  "
                         "You must create and connect to a Dask cluster before using afar."
                     )
+            if options["preload_imports"]:
+                modules = imported_modules(self._magic_func._scoped.func)
+                if modules:
+                    with stats.timer("preload"):
+                        preload(*modules, client=client)
+            if options["upload_modules"]:
+                with stats.timer("upload_modules"):
+                    upload_modules(self._magic_func, client)
+            if self._client_to_futures is None:
+                self._client_to_futures = WeakKeyDictionary()
             if client not in self._client_to_futures:
                 weak_futures = WeakSet()
                 self._client_to_futures[client] = weak_futures
             else:
                 weak_futures = self._client_to_futures[client]
+            # The delta cache belongs with `data`, which `run("x")` shares with `run`
+            owner = self if self._data_owner is None else self._data_owner
 
             to_scatter = data.keys() & self._magic_func._scoped.outer_scope.keys()
             if to_scatter:
@@ -180,61 +281,181 @@ class Run:
                 # in `self._magic_func._scoped.outer_scope`, but we can't reuse
                 # them, because they may get modified locally.
                 to_scatter = list(to_scatter)
+                patched = {}
+                if options["delta_transfer"]:
+                    if owner._delta_cache is None:
+                        owner._delta_cache = DeltaCache()
+                    with stats.timer("delta"):
+                        owner._delta_cache.prune(data)
+                        patched, all_hashes = owner._delta_cache.patch(
+                            client, {key: data[key] for key in to_scatter}
+                        )
+                    arrays = {key: data[key] for key in all_hashes}
+                    to_scatter = [key for key in to_scatter if key not in patched]
+                values = [data[key] for key in to_scatter]
+                if options["arrow"]:
+                    with stats.timer("arrow_data"):
+                        for i, val in enumerate(values):
+                            arrow_data = to_arrow(val)
+                            if arrow_data is not None:
+                                values[i] = arrow_data
+                if options["compression"] is not None:
+                    with stats.timer("compress_data"):
+                        values = [
+                            compress(val, options["compression"], options["compress_min_bytes"])
+                            for val in values
+                        ]
                 # I'm afraid to hash, because users may accidentally mutate things.
-                scattered = client.scatter([data[key] for key in to_scatter], hash=False)
+                with stats.timer("scatter_data"):
+                    scattered = client.scatter(values, hash=False) if values else []
+                    # Unpack compressed values on the cluster so they can be reused as-is
+                    scattered = [
+                        client.submit(unpack_afar, future, pure=False)
+                        if isinstance(val, (ArrowData, Compressed))
+                        else future
+                        for val, future in zip(values, scattered)
+                    ]
                 scattered = dict(zip(to_scatter, scattered))
+                if options["delta_transfer"]:
+                    owner._delta_cache.add(arrays, scattered, all_hashes)
+                    scattered.update(patched)
                 futures.update(scattered)
                 data.update(scattered)
-                for key in to_scatter:
+                for key in scattered:
                     del self._magic_func._scoped.outer_scope[key]
+            self._futures = WeakValueDictionary(futures)
 
             capture_print = True
             if capture_print and self._channel not in client._event_handlers:
                 client.subscribe_topic(self._channel, self._handle_print)
                 # When would be a good time to unsubscribe?
             async_print = capture_print and supports_async_output()
+            token = uuid4().hex
             if capture_print:
-                unique_key = uuid4().hex
+                unique_key = token
+                stats.key = unique_key
+                if display_expr:
+                    self._full_repr = FullRepr(
+                        client, self._magic_func._repr_methods, submit_kwargs
+                    )
+                else:
+                    self._full_repr = None
                 self._setup_print(unique_key, async_print)
             else:
                 unique_key = None
 
+            magic_func = self._magic_func
+            if options["lazy"]:
+                with stats.timer("lazy"):
+                    magic_func, lazy_values = make_lazy(magic_func, options["lazy_min_bytes"])
+                if lazy_values:
+                    self._lazy_values[unique_key] = (ref(client), lazy_values)
+            if options["arrow"]:
+                with stats.timer("arrow_func"):
+                    magic_func = scope_to_arrow(magic_func)
+            shared_paths = []
+            if options["shared_memory"] and is_same_host(client):
+                with stats.timer("share_memory"):
+                    magic_func, shared_paths = share_arrays(magic_func)
+            # Shared arrays are opened when the worker receives them, so don't compress them
+            if options["compression"] is not None and not shared_paths:
+                with stats.timer("compress_func"):
+                    magic_func = compress(
+                        magic_func, options["compression"], options["compress_min_bytes"]
+                    )
             # Scatter magic_func to avoid "Large object" UserWarning
-            magic_func = client.scatter(self._magic_func, hash=False)
+            with stats.timer("scatter_func"):
+                try:
+                    magic_func = client.scatter(magic_func, hash=False)
+                finally:
+                    remove_files(shared_paths)
             weak_futures.add(magic_func)
 
-            remote_dict = client.submit(
-                run_afar,
-                magic_func,
-                names,
-                futures,
-                capture_print,
-                self._channel,
-                unique_key,
-                pure=False,
-                **submit_kwargs,
-            )
-            weak_futures.add(remote_dict)
-            magic_func.release()  # Let go ASAP
-
-            if self._gather_data:
-                futures_to_name = {
-                    client.submit(get_afar, remote_dict, name, **submit_kwargs): name
+            # Name tasks after where the context is so they are easy to find in the dashboard
+            if location is None:
+                label = get_source_label()
+                annotations = {"afar_names": list(names)}
+            else:
+                filename, lineno = location
+                label = get_source_label(filename, lineno)
+                annotations = {"afar_location": f"{filename}:{lineno}", "afar_names": list(names)}
+            submit_start = time.time()
+            submit_t0 = time.perf_counter()
+            with dask.annotate(**annotations):
+                remote_dict = client.submit(
+                    run_afar,
+                    magic_func,
+                    names,
+                    futures,
+                    capture_print,
+                    self._channel,
+                    unique_key,
+                    options,
+                    key=f"run_afar:{label}-{token}",
+                    **submit_kwargs,
+                )
+                weak_futures.add(remote_dict)
+                magic_func.release()  # Let go ASAP
+                if unique_key in self._lazy_values:
+                    # Forget the lazy values when run_afar is done even if "finish" never
+                    # arrives.  This Future also keeps run_afar alive until then.
+                    Future(remote_dict.key, client).add_done_callback(
+                        partial(self._forget_lazy_values, unique_key)
+                    )
+                if display_expr and capture_print and options["separate_repr"]:
+                    # Compute the repr in a separate task so results are available sooner
+                    repr_future = client.submit(
+                        display_afar,
+                        remote_dict,
+                        self._magic_func._repr_methods,
+                        self._channel,
+                        unique_key,
+                        options,
+                        key=f"display_afar:{label}-{token}",
+                        **submit_kwargs,
+                    )
+                    weak_futures.add(repr_future)
+                    distributed.fire_and_forget(repr_future)
+                if self._full_repr is not None:
+                    # Keep the final expression remotely until we know whether its repr was
+                    # truncated, in which case the full repr may be requested.
+                    self._full_repr._set_future(remote_dict)
+                    remote_dict = Future(remote_dict.key, client)
+                name_to_future = {
+                    name: client.submit(
+                        get_afar,
+                        remote_dict,
+                        name,
+                        key=f"get_afar:{label}:{name}-{token}",
+                        **submit_kwargs,
+                    )
                     for name in names
                 }
-                weak_futures.update(futures_to_name)
-                remote_dict.release()  # Let go ASAP
-                for future, result in distributed.as_completed(futures_to_name, with_results=True):
-                    data[futures_to_name[future]] = result
+            weak_futures.update(name_to_future.values())
+            remote_dict.release()  # Let go ASAP
+            stats.client["submit"] = (submit_start, time.perf_counter() - submit_t0)
+
+            if self.liveness is not None:
+                replaced = self._replaced_futures(names, data)
+            if self._gather_data:
+                futures_to_name = {future: name for name, future in name_to_future.items()}
+                with stats.timer("gather"):
+                    for future, result in distributed.as_completed(
+                        futures_to_name, with_results=True
+                    ):
+                        data[futures_to_name[future]] = result
             else:
-                for name in names:
-                    future = client.submit(get_afar, remote_dict, name, **submit_kwargs)
-                    weak_futures.add(future)
-                    data[name] = future
-                remote_dict.release()  # Let go ASAP
+                data.update(name_to_future)
+                self._saved_futures.update(name_to_future.values())
+            if isinstance(data, LRUData):
+                with stats.timer("evict"):
+                    data.evict()
+            if owner._delta_cache is not None:
+                owner._delta_cache.prune(data)
         elif where == "locally":
             # Run locally.  This is handy for testing and debugging.
-            results = self._magic_func()
+            with stats.timer("execute"):
+                results = self._magic_func()
             for name in names:
                 data[name] = results[name]
             if display_expr:
@@ -251,10 +472,81 @@ class Run:
         # Try to update the variables in the frame.
         # This currently only works if f_locals is f_globals, or if tracing (don't ask).
         local_ns.update((name, data[name]) for name in names)
+        if replaced:
+            futures = None  # Don't count our own reference to the inputs of the context
+            self._check_liveness(replaced, location)
         return return_future
 
+    def _replaced_futures(self, names, data):
+        """Weak references to Futures saved by an earlier context that will be replaced"""
+        from dask.distributed import Future
+
+        # Only check Futures that afar saved, not Futures the user put in `data`
+        return {
+            name: ref(data[name])
+            for name in names
+            if isinstance(data.get(name), Future) and data[name] in self._saved_futures
+        }
+
+    def _check_liveness(self, replaced, location):
+        # Replaced Futures that aren't referenced elsewhere were already released
+        held = [name for name, future_ref in replaced.items() if future_ref() is not None]
+        if not held:
+            return
+        message = (
+            f"afar context replaced {', '.join(held)} saved by an earlier context, but the "
+            "earlier results are still referenced elsewhere (such as by another variable), "
+            "so they stay on the cluster."
+        )
+        if location is None:
+            warnings.warn(message, stacklevel=2)
+        else:
+            # Point to the context, not to afar
+            warnings.warn_explicit(message, UserWarning, *location)
+
+    def explain(self, data=None):
+        """Report the type, size, and how each input of the most recent context is sent.
+
+        Use this after a context (or with ``later`` to analyze a context without running
+        it) to find which variables make it slow to submit.  Values sent "inline" are
+        serialized with the function every time.  See ``%%afar --explain``.
+
+        Pass ``data`` if the context used data other than ``run.data``.
+        """
+        if self._magic_func is None:
+            raise RuntimeError("There is no context to explain yet.  Use `run` in a context first.")
+        from ._explain import explain
+
+        if data is None:
+            data = self.data
+        return explain(self._magic_func, self._futures, data)
+
+    @property
+    def progress(self):
+        """Latest progress reported by ``afar.progress`` in the most recent context"""
+        return self._progress
+
+    @property
+    def profile(self):
+        """``pstats.Stats`` of the most recent context if run with ``remotely(profile=True)``"""
+        if self.stats is None:
+            return None
+        return self.stats.profile
+
+    def full_repr(self):
+        """Fetch the full repr of the final expression of the most recent context.
+
+        This is only necessary if the displayed repr was truncated, which happens if
+        it is larger than the ``repr_max_size`` option such as ``remotely(repr_max_size=...)``.
+        """
+        if self._full_repr is None:
+            raise RuntimeError("The most recent context did not display an expression remotely")
+        return self._full_repr.fetch()
+
     def cancel(self, *, client=None, force=False):
         """Cancel pending tasks"""
+        if self._client_to_futures is None:
+            return
         if client is not None:
             items = [(client, self._client_to_futures[client])]
         else:
@@ -275,7 +567,9 @@ class Run:
             out.append_stdout("\N{SPARKLES} Running afar... \N{SPARKLES}")
         else:
             out = None
-        self._outputs[key] = [out, False]  # False means has not been updated
+        self._progress = Progress()
+        # False means has not been updated
+        self._outputs[key] = [out, False, self._progress, self._full_repr, self.stats]
 
     @classmethod
     def _handle_print(cls, event):
@@ -284,13 +578,51 @@ class Run:
         key, action, payload = msg
         if key not in cls._outputs:
             return
-        out, is_updated = cls._outputs[key]
+        out, is_updated, progress, full_repr, stats = cls._outputs[key]
+        stats._record_event(action, payload)
+        if action == "fetch":
+            # A worker wants a value from `remotely(lazy=True)`
+            from ._lazy import send_lazy
+
+            name, variable_name = payload
+            client_ref, values = cls._lazy_values.get(key, (None, None))
+            client = None if client_ref is None else client_ref()
+            if client is not None:
+                client.loop.add_callback(send_lazy, client, values[name], variable_name)
+            # Otherwise, the worker times out waiting for the value
+            return
+        if action == "log":
+            handle_records(payload)
+            return
+        if action == "stats":
+            stats._update_worker(payload)
+            return
+        if action == "memory":
+            from ._memory import format_report
+
+            stats.memory = payload
+            text = format_report(payload)
+            if out is None:
+                print(text, end="")
+            else:
+                out.append_stdout(text)
+            return
+        if action == "profile":
+            data, limit = payload
+            stats.profile = load_stats(data)
+            text = format_stats(stats.profile, limit)
+            if out is None:
+                print(text)
+            else:
+                out.append_stdout(text)
+            return
         if out is not None:
             if action == "begin":
                 if is_updated:
                     out.outputs = type(out.outputs)()
                     out.append_stdout("\N{SPARKLES} Running afar... (restarted) \N{SPARKLES}")
                     cls._outputs[key][1] = False  # is not updated
+                    progress._reset()
             else:
                 if not is_updated:
                     # Clear the "Running afar..." message
@@ -305,55 +637,158 @@ class Run:
             print(payload, end="")
         elif action == "stderr":
             print(payload, end="", file=sys.stderr)
-        if action == "display_expr":
-            display_repr(payload, out=out)
+        if action == "progress":
+            progress._update(*payload, out=out)
+        elif action == "display_expr":
+            if full_repr is not None:
+                full_repr._set_truncated(payload[3])
+            display_repr(payload, out=out, full_repr=full_repr)
             del cls._outputs[key]
+            cls._lazy_values.pop(key, None)
         elif action == "finish":
+            if full_repr is not None:
+                # No repr was sent (such as for None or an exception), so release the value
+                full_repr._set_truncated(False)
             del cls._outputs[key]
+            cls._lazy_values.pop(key, None)
+
+    @classmethod
+    def _forget_lazy_values(cls, key, future):
+        cls._lazy_values.pop(key, None)
 
 
 class Get(Run):
     """Unlike ``run``, ``get`` automatically gathers the data locally"""
 
+    __slots__ = ()
     _gather_data = True
 
 
-def run_afar(magic_func, names, futures, capture_print, channel, unique_key):
+def run_afar(magic_func, names, futures, capture_print, channel, unique_key, options):
+    # dask.distributed is already imported on workers
+    from dask.distributed import get_worker
+
+    from ._compression import Compressed
+    from ._lazy import LazyScope
+    from ._memory import MemoryTracker
+
     if capture_print:
         try:
             worker = get_worker()
             send_finish = True
         except ValueError:
             worker = None
+    timings = {}
+    if isinstance(magic_func, Compressed):
+        with timer(timings, "decompress"):
+            magic_func = magic_func.unpack()
+    if options["arrow"]:
+        with timer(timings, "unpack_arrow"):
+            futures = dict(
+                futures,
+                **{
+                    key: val.unpack()
+                    for key, val in magic_func._scoped.outer_scope.items()
+                    if isinstance(val, ArrowData)
+                },
+            )
+    pretty_repr = None
+    profile_data = None
+    memory = MemoryTracker() if options["trace_memory"] else nullcontext()
+    run_start = time.time()
+    run_t0 = time.perf_counter()
     try:
         if capture_print and worker is not None:
-            worker.log_event(channel, (unique_key, "begin", None))
+            worker.log_event(channel, (unique_key, "begin", time.time()))
             rec = PrintRecorder(channel, unique_key)
-            if "print" in magic_func._scoped.builtin_names and "print" not in futures:
-                sfunc = magic_func._scoped.bind(futures, print=rec)
-            else:
-                sfunc = magic_func._scoped.bind(futures)
-            with rec:
-                results = sfunc()
+            log_rec = LogRecorder(worker, channel, unique_key)
+            reporter = ProgressReporter(worker, channel, unique_key)
+            with timer(timings, "bind"):
+                if "print" in magic_func._scoped.builtin_names and "print" not in futures:
+                    sfunc = magic_func._scoped.bind(futures, print=rec)
+                else:
+                    sfunc = magic_func._scoped.bind(futures)
+                if options["lazy"]:
+                    sfunc.outer_scope = LazyScope(
+                        sfunc.outer_scope, worker, channel, unique_key, options["lazy_timeout"]
+                    )
+            with rec, log_rec, reporter, memory, timer(timings, "execute"):
+                results, profile_data = _execute(sfunc, options)
         else:
-            sfunc = magic_func._scoped.bind(futures)
-            results = sfunc()
+            with timer(timings, "bind"):
+                sfunc = magic_func._scoped.bind(futures)
+            with memory, timer(timings, "execute"):
+                results, profile_data = _execute(sfunc, options)
 
         rv = {key: results[key] for key in names}
 
         if magic_func._display_expr and worker is not None:
-            # Hopefully computing the repr is fast.  If it is slow, perhaps it would be
-            # better to add the return value to rv and call repr_afar as a separate task.
-            # Also, pretty_repr must be msgpack serializable if done via events.  Hence,
-            # custom _ipython_display_ doesn't work, and we resort to using a basic repr.
-            pretty_repr = repr_afar(results.return_value, magic_func._repr_methods)
+            # Keep the final expression in case the client wants the full repr
+            rv[RETURN_VALUE_KEY] = results.return_value
+            if options["separate_repr"]:
+                # The client submitted `display_afar` to compute the repr in another task
+                send_finish = False
+            else:
+                # Hopefully computing the repr is fast.  If it is slow, use the
+                # `separate_repr=True` option to compute it in a separate task.
+                with timer(timings, "repr"):
+                    pretty_repr = _compute_repr(
+                        results.return_value, magic_func._repr_methods, options
+                    )
+    finally:
+        if capture_print and worker is not None:
+            # Send stats first, because the client stops listening after display_expr or finish
+            if profile_data is not None:
+                payload = [profile_data, options["profile_limit"]]
+                worker.log_event(channel, (unique_key, "profile", payload))
+            if options["trace_memory"] and memory.report is not None:
+                worker.log_event(channel, (unique_key, "memory", memory.report))
+            timings["run_afar"] = (run_start, time.perf_counter() - run_t0)
+            worker.log_event(channel, (unique_key, "stats", dict(timings, worker=worker.address)))
             if pretty_repr is not None:
                 worker.log_event(channel, (unique_key, "display_expr", pretty_repr))
-                send_finish = False
+            elif send_finish:
+                worker.log_event(channel, (unique_key, "finish", None))
+    return rv
+
+
+def _execute(sfunc, options):
+    if options["profile"]:
+        return profile_call(sfunc)
+    return sfunc(), None
+
+
+def display_afar(d, repr_methods, channel, unique_key, options):
+    """Compute the repr of the final expression in a task separate from `run_afar`"""
+    from dask.distributed import get_worker
+
+    worker = get_worker()
+    timings = {}
+    pretty_repr = None
+    try:
+        with timer(timings, "repr"):
+            pretty_repr = _compute_repr(d[RETURN_VALUE_KEY], repr_methods, options)
     finally:
-        if capture_print and worker is not None and send_finish:
+        worker.log_event(channel, (unique_key, "stats", timings))
+        if pretty_repr is not None:
+            worker.log_event(channel, (unique_key, "display_expr", pretty_repr))
+        else:
             worker.log_event(channel, (unique_key, "finish", None))
-    return rv
+
+
+def _compute_repr(val, repr_methods, options):
+    # pretty_repr must be msgpack serializable if done via events.  Hence,
+    # custom _ipython_display_ doesn't work, and we resort to using a basic repr.
+    # Large reprs are truncated so we don't flood the scheduler with big events.
+    return repr_afar(val, repr_methods, options["repr_max_size"])
+
+
+def unpack_afar(packed):
+    from ._compression import Compressed
+
+    while isinstance(packed, (ArrowData, Compressed)):
+        packed = packed.unpack()
+    return packed
 
 
 def get_afar(d, k):
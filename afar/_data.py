@@ -0,0 +1,132 @@
+"""A data mapping for ``afar.run`` that bounds how much cluster memory it holds."""
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from dask.distributed import Future
+from dask.utils import format_bytes, parse_bytes
+
+
+class LRUData(MutableMapping):
+    """Mapping of names to values that keeps at most ``max_bytes`` of Futures.
+
+    Use this as the data of a long-lived ``afar.run`` so old results don't hold
+    memory on the cluster indefinitely:
+
+    >>> run = afar.run(data=afar.LRUData("2 GiB"))
+    >>> with run, remotely:
+    ...     ...
+
+    The size of each Future is its ``nbytes`` as reported by the scheduler once the
+    Future is finished.  After each context, the least recently used Futures are
+    evicted until the total size is within ``max_bytes``.  Evicted Futures are dropped,
+    which releases their data on the cluster unless they are referenced elsewhere,
+    such as by a variable with the same name in the local namespace.
+
+    If ``spill`` is given (any MutableMapping, such as a dict or ``zict.File``),
+    evicted Futures are first gathered and saved there.  Spilled values are still
+    available by name and are scattered again when a context uses them.
+
+    Values that aren't Futures don't use cluster memory and are never evicted.
+    """
+
+    def __init__(self, max_bytes, *, spill=None):
+        if isinstance(max_bytes, str):
+            max_bytes = parse_bytes(max_bytes)
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self._data = OrderedDict()  # least recently used first
+        self._nbytes = {}
+
+    def __getitem__(self, key):
+        if key in self._data:
+            self._data.move_to_end(key)
+            return self._data[key]
+        if self.spill is not None and key in self.spill:
+            return self.spill[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._nbytes.pop(key, None)
+        if self.spill is not None and key in self.spill:
+            del self.spill[key]
+
+    def __delitem__(self, key):
+        if key in self._data:
+            del self._data[key]
+            self._nbytes.pop(key, None)
+        elif self.spill is not None and key in self.spill:
+            del self.spill[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._data or self.spill is not None and key in self.spill
+
+    def __iter__(self):
+        yield from self._data
+        if self.spill is not None:
+            for key in self.spill:
+                if key not in self._data:
+                    yield key
+
+    def __len__(self):
+        if self.spill is None:
+            return len(self._data)
+        return len(self._data) + sum(1 for key in self.spill if key not in self._data)
+
+    @property
+    def nbytes(self):
+        """Total size in bytes of the Futures with known sizes"""
+        return sum(self._nbytes.values())
+
+    def _update_nbytes(self):
+        # Ask the scheduler for the sizes of finished Futures in one call per client
+        by_client = {}
+        for key, value in self._data.items():
+            if key not in self._nbytes and isinstance(value, Future) and value.done():
+                by_client.setdefault(value.client, {})[value.key] = key
+        for client, keys in by_client.items():
+            nbytes = client.nbytes(list(keys), summary=False)
+            for dask_key, size in nbytes.items():
+                if dask_key in keys:
+                    self._nbytes[keys[dask_key]] = size
+
+    def evict(self):
+        """Evict least recently used Futures until they use at most ``max_bytes``.
+
+        This is called automatically after each context that uses this mapping.
+        Returns the names that were evicted.
+        """
+        self._update_nbytes()
+        total = self.nbytes
+        evicted = []
+        for key in list(self._data):
+            if total <= self.max_bytes:
+                break
+            if key in self._nbytes:
+                evicted.append(key)
+                total -= self._nbytes[key]
+        if not evicted:
+            return evicted
+        if self.spill is not None:
+            by_client = {}
+            for key in evicted:
+                future = self._data[key]
+                if future.status == "finished":
+                    by_client.setdefault(future.client, {})[key] = future
+            for client, futures in by_client.items():
+                values = client.gather(list(futures.values()))
+                self.spill.update(zip(futures, values))
+        for key in evicted:
+            del self._data[key]
+            del self._nbytes[key]
+        return evicted
+
+    def __repr__(self):
+        num_spilled = len(self) - len(self._data)
+        return (
+            f"LRUData({len(self._data)} items, {format_bytes(self.nbytes)} of "
+            f"{format_bytes(self.max_bytes)}, {num_spilled} spilled)"
+        )
@@ -0,0 +1,124 @@
+"""Send only the changed blocks of arrays in ``data`` with ``remotely(delta_transfer=True)``.
+
+When a NumPy array in ``data`` is scattered, we remember a checksum of each block.
+If a new array with the same shape and dtype is later put in ``data`` under the same
+name, we compare checksums and submit a task that copies the previous array on the
+cluster and patches the changed blocks, instead of sending the whole array again.
+"""
+import sys
+
+from dask.distributed import Future
+from dask.hashing import hash_buffer
+
+from ._data import LRUData
+
+# Size of blocks to compare (in bytes)
+BLOCK_BYTES = 1 << 20
+# Only use delta transfer for arrays at least this large
+MIN_BYTES = 4 * BLOCK_BYTES
+# Send the whole array if more than this fraction of blocks changed
+MAX_CHANGED_FRACTION = 0.5
+
+
+def _as_bytes(val):
+    """Flat bytes of a large C-contiguous NumPy array, or None"""
+    np = sys.modules.get("numpy")
+    if (
+        np is None
+        or type(val) is not np.ndarray
+        or val.nbytes < MIN_BYTES
+        or val.dtype.hasobject
+        or not val.flags.c_contiguous
+    ):
+        return None
+    return memoryview(val).cast("B")
+
+
+def block_hashes(buf):
+    return [hash_buffer(buf[i : i + BLOCK_BYTES]) for i in range(0, len(buf), BLOCK_BYTES)]
+
+
+def patch_array(base, blocks):
+    """Copy base and overwrite the given blocks of bytes"""
+    import numpy as np
+
+    rv = base.copy()
+    buf = rv.reshape(-1).view(np.uint8)
+    for index, block in blocks.items():
+        start = index * BLOCK_BYTES
+        buf[start : start + len(block)] = np.frombuffer(block, np.uint8)
+    return rv
+
+
+class DeltaCache:
+    """Checksums of blocks of arrays previously scattered from ``data`` by name.
+
+    We keep the previous Future of each name so a new array can be patched from it,
+    but only while ``data`` may still use it (see ``prune``).
+    """
+
+    def __init__(self):
+        self._entries = {}  # name -> (future, dtype, shape, hashes)
+
+    def prune(self, data):
+        """Forget Futures that were removed from ``data`` or replaced by other Futures.
+
+        This respects ``del data[name]`` and eviction from ``LRUData``, so we don't hold
+        cluster memory that ``data`` let go.  A Future replaced by a local value is kept,
+        because that value may be sent as a delta of it.
+        """
+        # Don't use `LRUData.__getitem__`, which marks items as recently used
+        values = data._data if isinstance(data, LRUData) else data
+        for name, (future, *_) in list(self._entries.items()):
+            if name not in values:
+                del self._entries[name]
+            else:
+                val = values[name]
+                if isinstance(val, Future) and val is not future:
+                    del self._entries[name]
+
+    def patch(self, client, values):
+        """Get Futures of arrays in ``values`` by patching previous arrays of the same name.
+
+        Returns a dict of the Futures that don't need to be scattered, and a dict of the
+        checksums of all large arrays to pass to ``add`` after scattering the others.
+        """
+        patched = {}
+        all_hashes = {}
+        for name, val in values.items():
+            buf = _as_bytes(val)
+            if buf is None:
+                self._entries.pop(name, None)
+                continue
+            all_hashes[name] = hashes = block_hashes(buf)
+            entry = self._entries.get(name)
+            if entry is None:
+                continue
+            prev_future, dtype, shape, prev_hashes = entry
+            if (
+                prev_future.client is not client
+                or prev_future.status in {"error", "cancelled", "lost"}
+                or dtype != val.dtype
+                or shape != val.shape
+            ):
+                continue
+            changed = [i for i, (x, y) in enumerate(zip(hashes, prev_hashes)) if x != y]
+            if len(changed) > MAX_CHANGED_FRACTION * len(hashes):
+                continue
+            if changed:
+                blocks = {i: bytes(buf[i * BLOCK_BYTES : (i + 1) * BLOCK_BYTES]) for i in changed}
+                # Scatter the blocks so they aren't put in the task graph
+                [blocks] = client.scatter([blocks], hash=False)
+                future = client.submit(patch_array, prev_future, blocks, pure=False)
+            else:
+                future = prev_future
+            patched[name] = future
+            self._entries[name] = (future, val.dtype, val.shape, hashes)
+        return patched, all_hashes
+
+    def add(self, values, futures, all_hashes):
+        """Remember the checksums of arrays in ``values`` that were scattered as ``futures``"""
+        for name, future in futures.items():
+            if name in all_hashes:
+                val = values[name]
+                self._entries[name] = (future, val.dtype, val.shape, all_hashes[name])
@@ -0,0 +1,72 @@
+"""Report the size of each input of a context to see why it is slow to submit."""
+from dask.distributed import Future
+from dask.distributed.protocol import serialize
+from dask.sizeof import sizeof
+from dask.utils import format_bytes
+
+
+def _serialized_size(val):
+    header, frames = serialize(val, on_error="message")
+    if header.get("serializer") == "error":
+        return None
+    return sum(memoryview(frame).nbytes for frame in frames)
+
+
+class Explanation:
+    """Inputs of a context with their type, size, and how they are sent.
+
+    ``rows`` is a list of dicts with keys "name", "type", "how", "sizeof", and
+    "serialized", sorted from largest to smallest.  "how" is one of:
+
+    - "inline": serialized with the function for every submission
+    - "scatter": a local value in ``data`` that is scattered and then kept remotely
+    - "future": already on the cluster, so nothing is sent
+
+    For Futures, "sizeof" and "serialized" are the size on the cluster (if known).
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: -(row["serialized"] or row["sizeof"] or 0))
+
+    def total(self, how):
+        """Total serialized bytes of inputs sent as ``how``"""
+        return sum(row["serialized"] or 0 for row in self.rows if row["how"] == how)
+
+    def __repr__(self):
+        lines = [f"{'name':<20} {'type':<20} {'how':<8} {'sizeof':>10} {'serialized':>10}"]
+        for row in self.rows:
+            sizes = [
+                "-" if row[key] is None else format_bytes(row[key])
+                for key in ["sizeof", "serialized"]
+            ]
+            name, type_name, how = row["name"], row["type"], row["how"]
+            lines.append(f"{name:<20} {type_name:<20} {how:<8} {sizes[0]:>10} {sizes[1]:>10}")
+        lines.append(
+            f"Sent inline: {format_bytes(self.total('inline'))}; "
+            f"scattered: {format_bytes(self.total('scatter'))}"
+        )
+        return "\n".join(lines)
+
+
+def explain(magic_func, futures, data):
+    """Explain the inputs of a context given its MagicFunction, input Futures, and data"""
+    inputs = dict(magic_func._scoped.outer_scope)
+    if futures:
+        inputs.update(futures)
+    rows = []
+    remote = {}
+    for name, val in inputs.items():
+        row = {"name": name, "type": type(val).__name__}
+        if isinstance(val, Future):
+            row.update(how="future", sizeof=None, serialized=None)
+            remote.setdefault(val.client, {})[val.key] = row
+        else:
+            row["how"] = "scatter" if data is not None and name in data else "inline"
+            row["sizeof"] = sizeof(val)
+            row["serialized"] = _serialized_size(val)
+        rows.append(row)
+    for client, keys in remote.items():
+        for key, nbytes in client.nbytes(list(keys), summary=False).items():
+            if key in keys:
+                keys[key]["sizeof"] = keys[key]["serialized"] = nbytes
+    return Explanation(rows)
@@ -1,5 +1,7 @@
 """Utilities to get the lines of the context body."""
 import dis
+import os
+import re
 from inspect import findsource
 
 from ._utils import is_ipython
@@ -39,6 +41,28 @@ def get_lines(frame):
     return lines
 
 
+def get_source_label(filename=None, lineno=None):
+    """A short label of where a context is such as "analysis:42" or "cell7:3".
+
+    This is used in task keys, so it only contains word characters, ".", and ":".
+    Code from IPython cells (or from magics, where ``filename`` is None) is
+    labeled by the execution count of the cell.
+    """
+    if filename is None or filename.startswith("<ipython-input-") or "ipykernel_" in filename:
+        label = "afar"
+        if is_ipython():
+            from IPython import get_ipython
+
+            ip = get_ipython()
+            if ip is not None:
+                label = f"cell{ip.execution_count}"
+    else:
+        label = os.path.splitext(os.path.basename(filename))[0]
+    if lineno is not None:
+        label = f"{label}:{lineno}"
+    return re.sub(r"[^\w.:]", "_", label)
+
+
 def get_body_start(lines, with_start):
     line = lines[with_start]
     stripped = line.lstrip()
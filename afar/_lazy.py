@@ -0,0 +1,98 @@
+"""Send large captured values only if they are used with ``remotely(lazy=True)``.
+
+Large values in the outer scope of a context are kept on the client and replaced by
+``LazyValue`` placeholders.  On the worker, the global scope of the function is a
+``LazyScope``, which asks the client for a value (via the event channel) the first time
+it is looked up.  The client scatters the value and passes its Future back in a
+``Variable``, so values that are never used are never sent.
+"""
+import asyncio
+from uuid import uuid4
+
+from dask.distributed import Future, Variable, get_client
+from dask.sizeof import sizeof
+
+
+class LazyValue:
+    """Placeholder for a value that stays on the client until it is used"""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __reduce__(self):
+        return type(self), (self.name,)
+
+    def __repr__(self):
+        return f"LazyValue({self.name!r})"
+
+
+def make_lazy(magic_func, min_bytes):
+    """Copy magic_func with large values in its outer scope replaced by ``LazyValue``.
+
+    Returns the new MagicFunction and a dict of the values that were replaced.
+    """
+    values = {
+        key: val
+        for key, val in magic_func._scoped.outer_scope.items()
+        if sizeof(val) >= min_bytes
+    }
+    if not values:
+        return magic_func, values
+    return magic_func._bind({key: LazyValue(key) for key in values}), values
+
+
+async def send_lazy(client, value, variable_name):
+    """Scatter a value requested by a worker and put its Future in a ``Variable``"""
+    variable = Variable(variable_name, client=client)
+    try:
+        [future] = await client.scatter([value], hash=False, asynchronous=True)
+    except Exception as exc:
+        # Don't leave the worker waiting
+        await variable.set(f"{type(exc).__name__}: {exc}", asynchronous=True)
+        raise
+    await variable.set(future, asynchronous=True)
+
+
+class LazyScope(dict):
+    """Global scope that fetches ``LazyValue`` from the client when they are looked up"""
+
+    __slots__ = ("_worker", "_channel", "_unique_key", "_timeout")
+
+    def __init__(self, scope, worker, channel, unique_key, timeout):
+        super().__init__(scope)
+        self._worker = worker
+        self._channel = channel
+        self._unique_key = unique_key
+        self._timeout = timeout
+
+    def __getitem__(self, key):
+        val = dict.__getitem__(self, key)
+        if type(val) is LazyValue:
+            val = self[key] = self._fetch(key)
+        return val
+
+    def copy(self):
+        # Used by innerscope to create the globals of the function
+        return LazyScope(self, self._worker, self._channel, self._unique_key, self._timeout)
+
+    def _fetch(self, name):
+        variable_name = f"afar-lazy-{uuid4().hex}"
+        self._worker.log_event(self._channel, (self._unique_key, "fetch", [name, variable_name]))
+        variable = Variable(variable_name, client=get_client())
+        try:
+            try:
+                future = variable.get(timeout=self._timeout)
+            except (TimeoutError, asyncio.TimeoutError):
+                # Older versions of distributed raise asyncio.TimeoutError
+                raise TimeoutError(
+                    f"Timed out after {self._timeout} seconds waiting for {name!r} from the "
+                    "client.  Is the client still connected?  Use the `lazy_timeout` option "
+                    "to wait longer."
+                ) from None
+            if not isinstance(future, Future):
+                raise RuntimeError(f"Unable to get {name!r} from the client: {future}")
+            return future.result()
+        finally:
+            variable.delete()
@@ -0,0 +1,113 @@
+"""Classes used to forward ``logging`` records from a Dask task to the client."""
+import logging
+import threading
+import time
+
+
+def record_to_dict(record, worker=None):
+    """Convert a LogRecord to a msgpack-serializable dict"""
+    exc_text = record.exc_text
+    if exc_text is None and record.exc_info:
+        exc_text = logging.Formatter().formatException(record.exc_info)
+    return {
+        "name": record.name,
+        "msg": record.getMessage(),
+        "levelno": record.levelno,
+        "levelname": record.levelname,
+        "created": record.created,
+        "msecs": record.msecs,
+        "relativeCreated": record.relativeCreated,
+        "pathname": record.pathname,
+        "filename": record.filename,
+        "module": record.module,
+        "lineno": record.lineno,
+        "funcName": record.funcName,
+        "thread": record.thread,
+        "threadName": record.threadName,
+        "process": record.process,
+        "processName": record.processName,
+        "exc_text": exc_text,
+        "stack_info": record.stack_info,
+        "afar_worker": None if worker is None else worker.address,
+    }
+
+
+class LogRecorder(logging.Handler):
+    """Capture log records from the current thread and send them to the client in batches.
+
+    Only records that pass the worker's logging configuration (logger levels, filters,
+    and propagation to the root logger) are captured.
+    """
+
+    batch_size = 100
+    batch_interval = 0.25  # seconds
+
+    def __init__(self, worker, channel, key):
+        super().__init__()
+        self.worker = worker
+        self.channel = channel
+        self.key = key
+        # We run in a thread pool, so only capture records from the current task
+        self.thread_id = threading.get_ident()
+        self._batch = []
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def __enter__(self):
+        logging.getLogger().addHandler(self)
+        # Send records periodically, so a record followed by a long, quiet step isn't delayed
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="afar-log-flusher", daemon=True
+        )
+        self._flusher.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        logging.getLogger().removeHandler(self)
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        return False
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.batch_interval):
+            self.flush()
+
+    def filter(self, record):
+        return record.thread == self.thread_id and super().filter(record)
+
+    def emit(self, record):
+        # `self.lock` is already held by `Handler.handle`
+        try:
+            self._batch.append(record_to_dict(record, self.worker))
+        except Exception:
+            self.handleError(record)
+            return
+        if (
+            len(self._batch) >= self.batch_size
+            or time.monotonic() - self._last_flush >= self.batch_interval
+        ):
+            self._send()
+
+    def flush(self):
+        self.acquire()
+        try:
+            self._send()
+        finally:
+            self.release()
+
+    def _send(self):
+        self._last_flush = time.monotonic()
+        if self._batch:
+            batch = self._batch
+            self._batch = []
+            self.worker.log_event(self.channel, (self.key, "log", batch))
+
+
+def handle_records(records):
+    """Re-emit log records from a remote task into the local logging tree"""
+    for item in records:
+        logger = logging.getLogger(item["name"])
+        if logger.isEnabledFor(item["levelno"]):
+            logger.handle(logging.makeLogRecord(item))
@@ -12,14 +12,22 @@ from ._where import Where, remotely
 DOC_TEMPLATE = """Execute the cell on a dask.distributed cluster.
 
 Usage, in line mode:
-    %{name} [{get_arg}{run_arg}{data_arg}{where_arg}{client_arg}] code_to_run
+    %{name} [{get_arg}{run_arg}{data_arg}{where_arg}{client_arg} --profile --explain] code_to_run
 Usage, in cell mode
-    %%{name} [{get_arg}{run_arg}{data_arg}{where_arg}{client_arg} <variable_names>]
+    %%{name} [{get_arg}{run_arg}{data_arg}{where_arg}{client_arg} --profile --explain]
+        [<variable_names>]
     code...
     code...
 
 Options:
 {get_desc} {run_desc} {data_desc} {where_desc} {client_desc}
+  --profile
+    Profile the code remotely with cProfile and display the top functions.
+
+  --explain
+    Don't run the code.  Instead, show the type and size of each input and whether it
+    would be sent with the function, scattered, or is already on the cluster.
+
   <variable_names>
     Variable names (space- or comma-separated) from the cell to copy to the local
     namespace as dask Future objects.
@@ -84,6 +92,8 @@ class AfarMagicBase(Magics):
         if client is None:
             options += "c:"
             args.append("client=")
+        args.append("profile")
+        args.append("explain")
         opts, line = self.parse_options(
             line,
             options,
@@ -140,6 +150,8 @@ class AfarMagicBase(Magics):
                 )
         else:
             where = remotely
+        if "profile" in opts:
+            where = where._with_options(profile=True)
 
         if client is not None:
             pass
@@ -178,6 +190,16 @@ class AfarMagicBase(Magics):
         if not names:
             names = runner.names
         context_body = indent(context_body, "    ")
+        if "explain" in opts:
+            runner._run(
+                "later",
+                context_body,
+                names,
+                data,
+                global_ns=local_ns,
+                local_ns=local_ns,
+            )
+            return runner.explain(data)
         return runner._run(
             where.where,
             context_body,
@@ -187,6 +209,7 @@ class AfarMagicBase(Magics):
             local_ns=local_ns,
             client=client,
             submit_kwargs=where.submit_kwargs,
+            options=where.options,
             return_expr=cell is None,
         )
 
@@ -0,0 +1,79 @@
+"""Measure memory used by code run remotely."""
+import threading
+import tracemalloc
+
+import psutil
+from dask.utils import format_bytes
+
+
+class MemoryTracker:
+    """Track peak Python allocations (via tracemalloc) and process RSS of a block of code.
+
+    tracemalloc is process-wide, so allocations from other tasks running concurrently
+    on the same worker are included in the numbers.  The peak is only reset when no
+    other tracker is active, so ``report["overlapping"]`` is True if another tracker was
+    active at the same time, in which case the peak may be from the other block of code.
+    """
+
+    _lock = threading.Lock()
+    _num_tracking = 0
+    _num_entered = 0
+    _started_tracing = False
+
+    def __init__(self):
+        self.report = None
+        self._process = psutil.Process()
+        self._rss_before = None
+        self._traced_before = None
+        self._overlapping = False
+        self._num_entered_before = None
+
+    def __enter__(self):
+        cls = type(self)
+        with cls._lock:
+            if cls._num_tracking == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                cls._started_tracing = True
+            if cls._num_tracking == 0:
+                if hasattr(tracemalloc, "reset_peak"):  # Python >= 3.9
+                    tracemalloc.reset_peak()
+            else:
+                self._overlapping = True
+            cls._num_tracking += 1
+            cls._num_entered += 1
+            self._num_entered_before = cls._num_entered
+        self._traced_before = tracemalloc.get_traced_memory()[0]
+        self._rss_before = self._process.memory_info().rss
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        traced, peak = tracemalloc.get_traced_memory()
+        rss = self._process.memory_info().rss
+        cls = type(self)
+        with cls._lock:
+            if cls._num_entered != self._num_entered_before:
+                self._overlapping = True  # another tracker entered after us
+            cls._num_tracking -= 1
+            if cls._num_tracking == 0 and cls._started_tracing:
+                tracemalloc.stop()
+                cls._started_tracing = False
+        self.report = {
+            "peak_traced": max(peak - self._traced_before, 0),
+            "traced_delta": traced - self._traced_before,
+            "rss_before": self._rss_before,
+            "rss_after": rss,
+            "rss_delta": rss - self._rss_before,
+            "overlapping": self._overlapping,
+        }
+        return False
+
+
+def format_report(report):
+    rss_delta = report["rss_delta"]
+    sign = "-" if rss_delta < 0 else "+"
+    overlapping = " (may include overlapping contexts)" if report.get("overlapping") else ""
+    return (
+        f"afar memory: peak {format_bytes(report['peak_traced'])} allocated{overlapping}, "
+        f"RSS {format_bytes(report['rss_before'])} -> {format_bytes(report['rss_after'])} "
+        f"({sign}{format_bytes(abs(rss_delta))})\n"
+    )
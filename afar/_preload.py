@@ -0,0 +1,66 @@
+"""Import modules on workers ahead of time so the first run of a context is faster.
+
+Modules are imported by a worker plugin, so workers that join later (such as when
+autoscaling) import them too.  Use ``afar.preload`` to choose modules explicitly, or
+``remotely(preload_imports=True)`` to preload the modules imported in each context.
+"""
+import importlib
+import logging
+from weakref import WeakKeyDictionary
+
+from dask import distributed
+from dask.distributed import WorkerPlugin
+
+from ._utils import register_worker_plugin
+
+logger = logging.getLogger(__name__)
+
+# Modules that have been preloaded by each client
+_preloaded = WeakKeyDictionary()
+
+
+class PreloadImports(WorkerPlugin):
+    """Worker plugin that imports modules when a worker starts.
+
+    The modules each worker imported are in ``worker.plugins["afar-preload"].imported``.
+    """
+
+    name = "afar-preload"
+
+    def __init__(self, modules):
+        self.modules = sorted(modules)
+
+    def setup(self, worker):
+        self.imported = []
+        for module in self.modules:
+            try:
+                importlib.import_module(module)
+            except Exception as exc:
+                # The module may not be available on every worker; the context will tell
+                logger.warning("afar was unable to preload %r: %s", module, exc)
+            else:
+                self.imported.append(module)
+
+
+def preload(*modules, client=None):
+    """Import modules on all current and future workers.
+
+    >>> afar.preload("sklearn", "dask_cudf")
+
+    Returns the set of all modules preloaded by the client.  Modules that can't be
+    imported on a worker are logged on the worker and skipped.
+    """
+    if client is None:
+        client = distributed.client._get_global_client()
+        if client is None:
+            raise TypeError(
+                "No dask.distributed client found.  "
+                "You must create and connect to a Dask cluster before using afar."
+            )
+    preloaded = _preloaded.get(client, frozenset())
+    if not preloaded.issuperset(modules):
+        preloaded = preloaded.union(modules)
+        # Replaces the previous plugin of this name, so all modules are imported by new workers
+        register_worker_plugin(client, PreloadImports(preloaded), PreloadImports.name)
+        _preloaded[client] = preloaded
+    return set(preloaded)
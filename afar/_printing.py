@@ -4,8 +4,6 @@ import sys
 from io import StringIO
 from threading import Lock, local
 
-from dask.distributed import get_worker
-
 
 # Here's the plan: we'll capture all print statements to stdout and stderr
 # on the current thread.  But, we need to leave the other threads alone!
@@ -60,6 +58,8 @@ class PrintRecorder:
             stream_name = None
         LocalPrint.printer(*args, **kwargs, file=file)
         if stream_name is not None:
+            from dask.distributed import get_worker
+
             try:
                 worker = get_worker()
             except ValueError:
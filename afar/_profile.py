@@ -0,0 +1,43 @@
+"""Profile code run remotely with cProfile and display the results locally."""
+import cProfile
+import marshal
+import pstats
+from io import StringIO
+
+
+def profile_call(func):
+    """Call ``func()`` under cProfile.
+
+    Returns the result and the profile data as bytes, which is msgpack serializable.
+    """
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func)
+    finally:
+        profiler.create_stats()
+    return result, marshal.dumps(profiler.stats)
+
+
+class _ProfileData:
+    # `pstats.Stats` can load from any object with `create_stats` and `stats`
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def load_stats(data):
+    """Create a ``pstats.Stats`` object from data created by `profile_call`"""
+    return pstats.Stats(_ProfileData(marshal.loads(data)))
+
+
+def format_stats(stats, limit=20, sort="cumulative"):
+    """Table of the top ``limit`` functions sorted by ``sort``"""
+    prev_stream = stats.stream
+    stats.stream = stream = StringIO()
+    try:
+        stats.sort_stats(sort).print_stats(limit)
+    finally:
+        stats.stream = prev_stream
+    return stream.getvalue()
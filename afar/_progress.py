@@ -0,0 +1,137 @@
+"""Report progress from remote code and display it locally."""
+import sys
+import time
+from threading import local
+
+
+class _CurrentReporter(local):
+    reporter = None
+
+
+_current = _CurrentReporter()
+
+
+def progress(i, total=None):
+    """Report progress from within an afar context.
+
+    This sends a (throttled) progress event to the client, which displays it as a
+    progress bar.  The latest progress is available locally via ``run.progress``.
+    This does nothing if not called from within an afar context on a worker.
+
+    >>> with afar.run, remotely:
+    ...     for i, item in enumerate(items):
+    ...         process(item)
+    ...         afar.progress(i + 1, len(items))
+    """
+    reporter = _current.reporter
+    if reporter is not None:
+        reporter(i, total)
+
+
+class ProgressReporter:
+    """Send throttled progress events for the afar context running on this thread"""
+
+    min_interval = 0.1  # seconds
+
+    def __init__(self, worker, channel, key):
+        self.worker = worker
+        self.channel = channel
+        self.key = key
+        self._last_sent = 0.0
+        self._pending = None
+        self._prev = None
+
+    def __enter__(self):
+        self._prev = _current.reporter
+        _current.reporter = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        _current.reporter = self._prev
+        if self._pending is not None:
+            self._send(self._pending)
+        return False
+
+    def __call__(self, i, total=None):
+        now = time.monotonic()
+        if now - self._last_sent >= self.min_interval or total is not None and i >= total:
+            self._last_sent = now
+            self._send([i, total])
+        else:
+            self._pending = [i, total]
+
+    def _send(self, payload):
+        self._pending = None
+        self.worker.log_event(self.channel, (self.key, "progress", payload))
+
+
+class Progress:
+    """The latest progress of an afar context as reported by ``afar.progress``"""
+
+    bar_width = 30
+
+    def __init__(self):
+        self.n = None
+        self.total = None
+        self.last_update = None
+        self._bar = None
+
+    @property
+    def fraction(self):
+        if self.n is None or not self.total:
+            return None
+        return min(self.n / self.total, 1.0)
+
+    @property
+    def done(self):
+        return self.total is not None and self.n is not None and self.n >= self.total
+
+    def __repr__(self):
+        if self.n is None:
+            return "Progress(not started)"
+        if self.total is None:
+            return f"Progress({self.n})"
+        return f"Progress({self.n}/{self.total})"
+
+    def _reset(self):
+        self._bar = None
+
+    def _update(self, n, total, out=None):
+        self.n = n
+        self.total = total
+        self.last_update = time.time()
+        if out is not None:
+            self._update_widget(out)
+        else:
+            self._update_terminal()
+
+    def _update_widget(self, out):
+        if self._bar is None:
+            from ipywidgets import IntProgress
+
+            self._bar = IntProgress(min=0)
+            out.append_display_data(self._bar)
+        bar = self._bar
+        if self.total is not None:
+            bar.max = max(self.total, 1)
+            bar.value = min(self.n, bar.max)
+            bar.description = f"{self.n}/{self.total}"
+        else:
+            bar.description = f"{self.n}"
+        if self.done:
+            bar.bar_style = "success"
+
+    def _update_terminal(self):
+        fraction = self.fraction
+        if fraction is None:
+            line = f"\r[afar] {self.n}"
+        else:
+            filled = int(round(fraction * self.bar_width))
+            line = (
+                f"\r[afar] [{'#' * filled}{' ' * (self.bar_width - filled)}] "
+                f"{fraction:4.0%} ({self.n}/{self.total})"
+            )
+        if self.done:
+            line += "\n"
+        sys.stderr.write(line)
+        sys.stderr.flush()
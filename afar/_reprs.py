@@ -1,6 +1,7 @@
 """Utilities to calculate the (pretty) repr of objects remotely and display locally."""
 import sys
 import traceback
+from weakref import WeakKeyDictionary
 
 
 class AttrRecorder:
@@ -21,25 +22,87 @@ class AttrRecorder:
         raise AttributeError(attr)
 
 
+# shell -> (formatter state, repr methods)
+_repr_methods_cache = WeakKeyDictionary()
+
+
+def _formatter_state(display_formatter):
+    """A cheap summary of the display formatters that changes when formatters change"""
+    return (
+        tuple(display_formatter.active_types),
+        tuple(
+            (
+                key,
+                id(formatter),
+                formatter.enabled,
+                formatter.print_method,
+                len(formatter.type_printers),
+                len(formatter.deferred_printers),
+            )
+            for key, formatter in display_formatter.formatters.items()
+        ),
+    )
+
+
 def get_repr_methods():
-    """List of repr methods that IPython/Jupyter tries to use"""
+    """List of repr methods that IPython/Jupyter tries to use
+
+    The result is cached per shell and recomputed only if the display formatters change.
+    """
     from IPython import get_ipython
 
     ip = get_ipython()
     if ip is None:
         return
+    state = _formatter_state(ip.display_formatter)
+    cached = _repr_methods_cache.get(ip)
+    if cached is not None and cached[0] == state:
+        return list(cached[1])
     attr_recorder = AttrRecorder()
     ip.display_formatter.format(attr_recorder)
+    _repr_methods_cache[ip] = (state, tuple(attr_recorder._attrs))
     return attr_recorder._attrs
 
 
-def repr_afar(val, repr_methods):
+# Key used to keep the final expression in the dict returned by `run_afar`
+RETURN_VALUE_KEY = "_afar_return_value_"
+
+
+def payload_size(payload):
+    """Approximate size of a repr payload in characters (or bytes)"""
+    if isinstance(payload, (str, bytes)):
+        return len(payload)
+    if isinstance(payload, dict):
+        return sum(payload_size(val) for val in payload.values())
+    if isinstance(payload, (list, tuple)):
+        return sum(payload_size(val) for val in payload)
+    return 0
+
+
+def truncate_repr(val, max_size):
+    """A basic repr that is no larger than ``max_size``"""
+    text = repr(val)
+    if len(text) <= max_size:
+        return text
+    return f"{text[:max_size]}\n... [truncated; full repr has {len(text)} characters]"
+
+
+def repr_afar(val, repr_methods, max_size=None):
     """Compute the repr of an object for IPython/Jupyter.
 
-    We call this on a remote object.
+    We call this on a remote object.  Returns ``(repr, method_name, is_exception,
+    is_truncated)``.  If ``max_size`` is given and the repr is larger than this, then
+    the basic repr is truncated and used instead.
     """
     if val is None:
         return None
+    rv = _repr_afar(val, repr_methods)
+    if max_size is not None and not rv[2] and payload_size(rv[0]) > max_size:
+        return truncate_repr(val, max_size), "__repr__", False, True
+    return rv + (False,)
+
+
+def _repr_afar(val, repr_methods):
     for method_name in repr_methods:
         method = getattr(val, method_name, None)
         if method is None:
@@ -68,6 +131,75 @@ def repr_afar(val, repr_methods):
     return repr(val), "__repr__", False
 
 
+def full_repr_afar(d, repr_methods):
+    """Compute the full repr of the final expression held in the result of `run_afar`"""
+    return repr_afar(d[RETURN_VALUE_KEY], repr_methods)
+
+
+class FullRepr:
+    """Handle to fetch the full repr of a remote value whose displayed repr was truncated.
+
+    The full repr is computed remotely as a normal task.
+    """
+
+    def __init__(self, client, repr_methods, submit_kwargs=None):
+        self.client = client
+        self.is_truncated = None  # Unknown until the repr arrives
+        self._future = None
+        self._repr_methods = repr_methods
+        self._submit_kwargs = submit_kwargs or {}
+
+    def _set_future(self, future):
+        self._future = future
+        if self.is_truncated is False:
+            self.release()
+
+    def _set_truncated(self, is_truncated):
+        self.is_truncated = is_truncated
+        if not is_truncated:
+            self.release()
+
+    def release(self):
+        """Release the remote value; the full repr will no longer be available"""
+        if self._future is not None:
+            self._future.release()
+            self._future = None
+
+    def submit(self):
+        """Submit a task to compute the full repr and return its Future"""
+        if self._future is None:
+            raise RuntimeError("The remote value for the full repr is no longer available")
+        return self.client.submit(
+            full_repr_afar, self._future, self._repr_methods, pure=False, **self._submit_kwargs
+        )
+
+    def fetch(self):
+        """Compute the full repr remotely and return an object that displays it"""
+        val, method_name, is_exception, _ = self.submit().result()
+        if is_exception:
+            raise RuntimeError("".join(val))
+        return MimicRepr(val, method_name)
+
+    def _show_more_button(self, out):
+        from ipywidgets import Button
+
+        button = Button(description="Show full repr")
+
+        def on_click(_):
+            button.disabled = True
+            button.description = "Fetching full repr..."
+            future = self.submit()
+
+            def display_full_repr(future):
+                out.outputs = type(out.outputs)()
+                display_repr(future.result(), out=out)
+
+            future.add_done_callback(display_full_repr)
+
+        button.on_click(on_click)
+        return button
+
+
 class MimicRepr:
     def __init__(self, val, method_name):
         self.val = val
@@ -88,9 +220,9 @@ class MimicRepr:
         return self.val
 
 
-def display_repr(results, out=None):
+def display_repr(results, out=None, full_repr=None):
     """Display results from `repr_afar` locally in IPython/Jupyter"""
-    val, method_name, is_exception = results
+    val, method_name, is_exception, is_truncated = results
     if is_exception:
         if out is None:
             print(val, file=sys.stderr)
@@ -114,3 +246,10 @@ def display_repr(results, out=None):
             display(mimic)
         else:
             out.append_display_data(mimic)
+    if is_truncated and full_repr is not None:
+        if out is None:
+            print(
+                "(repr truncated; use `run.full_repr()` to fetch the full repr)", file=sys.stderr
+            )
+        else:
+            out.append_display_data(full_repr._show_more_button(out))
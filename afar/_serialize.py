@@ -0,0 +1,43 @@
+"""Serialize ``MagicFunction`` with dask's serialization families.
+
+Pickling a ``MagicFunction`` serializes every captured value in one pickle stream,
+and the whole stream falls back to cloudpickle if any value needs it.  Instead, we
+serialize each captured value separately with dask's serializers, so large buffers
+(such as NumPy arrays and pandas frames) are sent as separate frames without being
+copied, and values with a custom dask serializer (such as GPU arrays) use it.
+"""
+from dask.distributed.protocol import (
+    dask_deserialize,
+    dask_serialize,
+    deserialize,
+    serialize,
+)
+
+from ._abra import MagicFunction
+
+
+@dask_serialize.register(MagicFunction)
+def serialize_magic_function(magic_func):
+    header, frames = serialize(
+        magic_func._scoped.outer_scope, on_error="raise", iterate_collection=True
+    )
+    header = {
+        "outer-scope": header,
+        "source": magic_func._source,
+        "display-expr": magic_func._display_expr,
+        "repr-methods": magic_func._repr_methods,
+    }
+    return header, frames
+
+
+@dask_deserialize.register(MagicFunction)
+def deserialize_magic_function(header, frames):
+    outer_scope = deserialize(header["outer-scope"], frames)
+    repr_methods = header["repr-methods"]
+    if repr_methods is not None:
+        repr_methods = list(repr_methods)
+    magic_func = MagicFunction.__new__(MagicFunction)
+    magic_func.__setstate__(
+        (header["source"], header["display-expr"], repr_methods, dict(outer_scope))
+    )
+    return magic_func
@@ -0,0 +1,114 @@
+"""Hand large NumPy arrays to workers on the same machine via memory-mapped files.
+
+With ``remotely(shared_memory=True)``, captured arrays are written to files in
+``/dev/shm`` (which is in memory on Linux), and workers open them as copy-on-write
+``np.memmap`` arrays instead of receiving them over a socket.  This is only done if
+all workers are on the same host as the client.
+"""
+import os
+import socket
+import sys
+import tempfile
+from uuid import uuid4
+
+from dask.distributed.comm import get_address_host, parse_address
+from dask.distributed.utils import get_ip
+
+# Arrays smaller than this are sent as usual
+MIN_BYTES = 1_000_000
+
+
+def _shared_dir():
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def _local_hosts():
+    hosts = {"127.0.0.1", "::1", "localhost", socket.gethostname()}
+    try:
+        hosts.add(get_ip())
+        hosts.add(socket.gethostbyname(socket.gethostname()))
+    except OSError:  # pragma: no cover
+        pass
+    return hosts
+
+
+def is_same_host(client):
+    """Are all workers on the same machine as the client (and not in-process)?"""
+    workers = client.scheduler_info().get("workers", {})
+    if not workers:
+        return False
+    local_hosts = _local_hosts()
+    for address in workers:
+        scheme, _ = parse_address(address)
+        if scheme == "inproc" or get_address_host(address) not in local_hosts:
+            return False
+    return True
+
+
+def open_shared_array(path, dtype, shape):
+    import numpy as np
+
+    # Copy-on-write, so modifying the array doesn't change the file or other readers
+    return np.memmap(path, mode="c", dtype=dtype, shape=shape)
+
+
+class SharedArray:
+    """Placeholder that is unpickled as a memory-mapped array on the worker"""
+
+    __slots__ = ("path", "dtype", "shape")
+
+    def __init__(self, array):
+        self.path = os.path.join(_shared_dir(), f"afar-{uuid4().hex}")
+        self.dtype = array.dtype.str
+        self.shape = array.shape
+        array.tofile(self.path)
+
+    def __reduce__(self):
+        return open_shared_array, (self.path, self.dtype, self.shape)
+
+
+def _is_shareable(val):
+    np = sys.modules.get("numpy")
+    return (
+        np is not None
+        and type(val) is np.ndarray
+        and val.nbytes >= MIN_BYTES
+        and not val.dtype.hasobject
+        and val.flags.c_contiguous
+    )
+
+
+def share_arrays(magic_func):
+    """Copy magic_func with large arrays in its outer scope replaced by ``SharedArray``
+
+    Returns the new MagicFunction and a list of files to remove once it's been scattered.
+    Workers deserialize scattered data when they receive it, and the memory stays
+    mapped after the files are removed until the arrays are no longer used.
+    """
+    shared = {
+        key: SharedArray(val)
+        for key, val in magic_func._scoped.outer_scope.items()
+        if _is_shareable(val)
+    }
+    if not shared:
+        return magic_func, []
+    return magic_func._bind(shared), [val.path for val in shared.values()]
+
+
+# Files we were unable to remove yet, such as on Windows while a worker has them mapped
+_pending_removal = set()
+
+
+def remove_files(paths):
+    """Remove files of shared arrays, and retry files we were unable to remove before"""
+    _pending_removal.update(paths)
+    for path in list(_pending_removal):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue  # Try again next time; don't fail a context that was submitted
+        _pending_removal.discard(path)
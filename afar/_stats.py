@@ -0,0 +1,124 @@
+"""Record where afar spends time for each context."""
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# `client` and `worker` timings of the most recent contexts; used by `afar.stats()`.
+# Only the timings are kept, not the (possibly large) profile or memory data.
+_history = deque(maxlen=10_000)
+# Active `afar.trace` objects that collect every new context
+_active_traces = []
+
+
+@contextmanager
+def timer(timings, phase):
+    """Record ``(start, duration)`` of the block in ``timings[phase]``"""
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = (start, time.perf_counter() - t0)
+
+
+class ContextStats:
+    """Timings of a single afar context.
+
+    ``client`` and ``worker`` map phase names to ``(start, duration)`` in seconds,
+    where ``start`` is a wall-clock timestamp from ``time.time()``.  Client phases
+    are recorded as the context is analyzed and submitted, and worker phases arrive
+    asynchronously once the context has run remotely.
+    """
+
+    def __init__(self):
+        self.where = None
+        self.key = None
+        self.worker_address = None
+        self.client = {}
+        self.worker = {}
+        # pstats.Stats object if the context was profiled
+        self.profile = None
+        # dict of peak allocations and RSS if run with `trace_memory=True`
+        self.memory = None
+        # Estimated offset of the worker's clock to the client's clock (seconds)
+        self.clock_offset = None
+        # (action, client timestamp) of events from the worker; only recorded if tracing
+        self.events = None
+        _history.append((self.client, self.worker))
+        if _active_traces:
+            self.events = []
+            for trace in _active_traces:
+                trace._add(self)
+
+    def timer(self, phase):
+        return timer(self.client, phase)
+
+    def _record_event(self, action, payload):
+        now = time.time()
+        if action == "begin" and payload is not None:
+            # Includes the latency from the worker to the client
+            offset = now - payload
+            if self.clock_offset is None or offset < self.clock_offset:
+                self.clock_offset = offset
+        if self.events is not None:
+            self.events.append((action, now))
+
+    def _update_worker(self, payload):
+        payload = dict(payload)
+        self.worker_address = payload.pop("worker", self.worker_address)
+        self.worker.update((phase, tuple(val)) for phase, val in payload.items())
+
+    @property
+    def durations(self):
+        """Mapping of ``"client.<phase>"`` and ``"worker.<phase>"`` to durations in seconds"""
+        return _durations(self.client, self.worker)
+
+    def __repr__(self):
+        lines = [f"ContextStats(where={self.where!r})"]
+        for name, duration in self.durations.items():
+            lines.append(f"  {name:<24} {duration * 1000:10.3f} ms")
+        return "\n".join(lines)
+
+
+def _durations(client, worker):
+    rv = {f"client.{phase}": duration for phase, (_, duration) in client.items()}
+    rv.update((f"worker.{phase}", duration) for phase, (_, duration) in worker.items())
+    return rv
+
+
+def _percentile(sorted_values, q):
+    # Nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def stats(*, clear=False):
+    """Aggregate timings of recent afar contexts.
+
+    Returns a dict that maps ``"client.<phase>"`` and ``"worker.<phase>"`` names to
+    summaries with count, total, mean, min, p50, p90, p99, and max durations in seconds.
+    Timings of a single context are available from ``run.stats``.
+
+    Use ``clear=True`` to forget the timings recorded so far.
+    """
+    by_phase = {}
+    for client, worker in _history:
+        for name, duration in _durations(client, worker).items():
+            by_phase.setdefault(name, []).append(duration)
+    if clear:
+        _history.clear()
+    rv = {}
+    for name, values in by_phase.items():
+        values.sort()
+        total = sum(values)
+        rv[name] = {
+            "count": len(values),
+            "total": total,
+            "mean": total / len(values),
+            "min": values[0],
+            "p50": _percentile(values, 50),
+            "p90": _percentile(values, 90),
+            "p99": _percentile(values, 99),
+            "max": values[-1],
+        }
+    return rv
@@ -0,0 +1,130 @@
+"""Export afar activity as a Chrome trace-event JSON file.
+
+Load the file in ``chrome://tracing`` or https://ui.perfetto.dev to see when each
+context was analyzed, submitted, and run, and where the gaps are.
+"""
+import json
+
+from . import _stats
+
+
+class Trace:
+    """Collect timings of afar contexts and write them as Chrome trace events.
+
+    Use as a context manager:
+
+    >>> with afar.trace("afar-trace.json"):
+    ...     with afar.run, remotely:
+    ...         ...
+
+    or call ``start()`` and ``stop()``, which is handy across notebook cells.
+    Worker timestamps are shifted to the client's clock using the smallest observed
+    difference between when a worker sent the "begin" event and when the client
+    received it, so they are approximate (and may be late by the network latency).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stop()
+        return False
+
+    def start(self):
+        if self not in _stats._active_traces:
+            _stats._active_traces.append(self)
+        return self
+
+    def stop(self):
+        """Stop collecting new contexts and write the trace file"""
+        if self in _stats._active_traces:
+            _stats._active_traces.remove(self)
+        self.write()
+        return self
+
+    def _add(self, record):
+        self.records.append(record)
+
+    def write(self, path=None):
+        """Write the trace file.  Worker timings that have not arrived yet are omitted."""
+        if path is None:
+            path = self.path
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    def to_dict(self):
+        """The trace as a dict in the Chrome trace-event format"""
+        pids = {"client": 0}
+        offsets = {}
+        for record in self.records:
+            if record.worker_address is not None and record.clock_offset is not None:
+                prev = offsets.get(record.worker_address)
+                if prev is None or record.clock_offset < prev:
+                    offsets[record.worker_address] = record.clock_offset
+        events = []
+        for tid, record in enumerate(self.records, 1):
+            args = {"where": record.where, "key": record.key}
+            events.append(_metadata("thread_name", 0, tid, f"context {tid} ({record.where})"))
+            for phase, (start, duration) in record.client.items():
+                events.append(_span(phase, "client", 0, tid, start, duration, args))
+            for action, timestamp in record.events or ():
+                events.append(
+                    {
+                        "name": action,
+                        "cat": "event",
+                        "ph": "i",
+                        "s": "t",
+                        "pid": 0,
+                        "tid": tid,
+                        "ts": _us(timestamp),
+                        "args": args,
+                    }
+                )
+            if record.worker and record.worker_address is not None:
+                address = record.worker_address
+                if address not in pids:
+                    pids[address] = len(pids)
+                    events.append(_metadata("process_name", pids[address], None, address))
+                pid = pids[address]
+                events.append(_metadata("thread_name", pid, tid, f"context {tid}"))
+                offset = offsets.get(address, 0)
+                for phase, (start, duration) in record.worker.items():
+                    events.append(_span(phase, "worker", pid, tid, start + offset, duration, args))
+        events.append(_metadata("process_name", 0, None, "client"))
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _us(seconds):
+    return seconds * 1e6
+
+
+def _span(name, category, pid, tid, start, duration, args):
+    return {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "pid": pid,
+        "tid": tid,
+        "ts": _us(start),
+        "dur": _us(duration),
+        "args": args,
+    }
+
+
+def _metadata(name, pid, tid, value):
+    rv = {"name": name, "ph": "M", "pid": pid, "args": {"name": value}}
+    if tid is not None:
+        rv["tid"] = tid
+    return rv
+
+
+def trace(path):
+    """Record every afar context to a Chrome trace-event JSON file at ``path``.
+
+    See ``Trace`` for details.
+    """
+    return Trace(path)
@@ -0,0 +1,111 @@
+"""Upload local modules used by a context to workers with ``remotely(upload_modules=True)``.
+
+Functions and classes from a local module (such as ``helpers.py`` next to a notebook)
+are pickled by reference, so they fail on workers that can't import the module.  We
+find local modules of the values a context captures (and the local modules they use),
+and upload each with an ``UploadFile`` worker plugin, so workers that join later get
+them too.  A module is uploaded again only if the content of its file changed.
+"""
+import hashlib
+import inspect
+import os
+import site
+import sys
+import sysconfig
+from weakref import WeakKeyDictionary
+
+from distributed.diagnostics.plugin import UploadFile
+
+from ._utils import register_worker_plugin
+
+# Path and content hash of each file name uploaded by each client
+_uploaded = WeakKeyDictionary()
+
+
+def _installed_dirs():
+    dirs = {sys.prefix, sys.base_prefix, sys.exec_prefix, sys.base_exec_prefix}
+    dirs.update(sysconfig.get_paths().values())
+    if hasattr(site, "getsitepackages"):  # not available in some virtualenvs
+        dirs.update(site.getsitepackages())
+    dirs.add(site.getusersitepackages())
+    return tuple(os.path.join(os.path.realpath(path), "") for path in dirs if path)
+
+
+def _local_file(module, installed_dirs):
+    """Path of the file of a local top-level module, or None"""
+    name = module.__name__
+    if "." in name or name == "__main__":
+        return None
+    path = getattr(module, "__file__", None)
+    if (
+        not path
+        or not path.endswith(".py")
+        or os.path.basename(path) == "__init__.py"  # packages aren't single files
+    ):
+        return None
+    path = os.path.realpath(path)
+    if path.startswith(installed_dirs) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def _module_of(val):
+    if inspect.ismodule(val):
+        return val
+    if not (inspect.isfunction(val) or inspect.isclass(val)):
+        val = type(val)
+    return sys.modules.get(getattr(val, "__module__", None))
+
+
+def local_modules(values):
+    """Paths of local modules that values come from, including local modules they use.
+
+    Modules come after the local modules they use, so they can be uploaded in order.
+    """
+    installed_dirs = _installed_dirs()
+    paths = {}
+    seen = set()
+
+    def visit(val):
+        module = _module_of(val)
+        if module is None or module.__name__ in seen:
+            return
+        seen.add(module.__name__)
+        path = _local_file(module, installed_dirs)
+        if path is not None:
+            # Modules, functions, and classes that the module uses may be local too
+            for item in vars(module).values():
+                if inspect.ismodule(item) or inspect.isfunction(item) or inspect.isclass(item):
+                    visit(item)
+            paths[module.__name__] = path
+
+    for val in values:
+        visit(val)
+    return paths
+
+
+def upload_modules(magic_func, client):
+    """Upload local modules used by magic_func that changed since we last uploaded them.
+
+    Returns the names of the modules that were uploaded.
+    """
+    uploaded = _uploaded.setdefault(client, {})
+    rv = []
+    for name, path in local_modules(magic_func._scoped.outer_scope.values()).items():
+        # Workers save uploaded files by file name in the same directory
+        filename = os.path.basename(path)
+        prev_path, prev_token = uploaded.get(filename, (path, None))
+        if prev_path != path:
+            raise ValueError(
+                f"Unable to upload module {name!r} from {path!r}, because {prev_path!r} was "
+                "already uploaded to the workers with the same file name.  Rename one of them."
+            )
+        with open(path, "rb") as f:
+            token = hashlib.sha256(f.read()).hexdigest()
+        if token == prev_token:
+            continue
+        # Use the same plugin name for each file, so new workers only get the latest version
+        register_worker_plugin(client, UploadFile(path), f"afar-upload-{filename}")
+        uploaded[filename] = (path, token)
+        rv.append(name)
+    return rv
@@ -2,8 +2,6 @@ import builtins
 import sys
 from types import CodeType
 
-from distributed.utils import is_kernel
-
 
 def is_terminal():
     if not is_ipython():
@@ -17,7 +15,16 @@ def is_ipython():
     return hasattr(builtins, "__IPYTHON__") and "IPython" in sys.modules
 
 
+def register_worker_plugin(client, plugin, name):
+    """Register a plugin for all current and future workers"""
+    if hasattr(client, "register_plugin"):  # distributed >= 2023.9.2
+        return client.register_plugin(plugin, name=name)
+    return client.register_worker_plugin(plugin, name=name)
+
+
 def supports_async_output():
+    from distributed.utils import is_kernel
+
     if is_kernel() and not is_terminal():
         try:
             import ipywidgets  # noqa
@@ -18,10 +18,47 @@ except NameError as exc:
 
 
 class Where:
-    def __init__(self, where, client=None, submit_kwargs=None):
+    __slots__ = ("where", "client", "submit_kwargs", "options")
+    # Keyword arguments handled by afar.  All other keyword arguments go to `client.submit`.
+    default_options = {
+        # Maximum size (in characters) of the repr of the final expression sent to the client
+        "repr_max_size": 1_000_000,
+        # Compute the repr of the final expression in a separate task
+        "separate_repr": False,
+        # Profile the code with cProfile and display the top functions locally
+        "profile": False,
+        "profile_limit": 20,
+        # Track peak Python allocations (tracemalloc) and worker RSS
+        "trace_memory": False,
+        # Compress the captured variables and scattered data, such as "lz4" or "zstd"
+        "compression": None,
+        # Don't compress payloads smaller than this (in bytes)
+        "compress_min_bytes": 10_000,
+        # Pass large NumPy arrays via memory-mapped files if all workers are on this machine
+        "shared_memory": False,
+        # Send pandas DataFrames and Arrow tables as Arrow IPC streams (requires pyarrow)
+        "arrow": False,
+        # Send only the changed blocks of large NumPy arrays reassigned in `data`
+        "delta_transfer": False,
+        # Keep large captured values on the client until the worker uses them
+        "lazy": False,
+        # Only keep values at least this large (in bytes) on the client
+        "lazy_min_bytes": 1_000_000,
+        # Seconds a worker waits for a lazy value before giving up (the client may be gone)
+        "lazy_timeout": 300,
+        # Import the modules imported in the context on all current and future workers
+        "preload_imports": False,
+        # Upload local modules (not installed on workers) that the context uses
+        "upload_modules": False,
+    }
+
+    def __init__(self, where, client=None, submit_kwargs=None, options=None):
         self.where = where
         self.client = client
         self.submit_kwargs = submit_kwargs
+        if options is None:
+            options = dict(self.default_options)
+        self.options = options
 
     def __enter__(self):
         raise AfarException(self)
@@ -29,8 +66,18 @@ class Where:
     def __exit__(self, exc_type, exc_value, exc_traceback):  # pragma: no cover
         return False
 
-    def __call__(self, client=None, **submit_kwargs):
-        return Where(self.where, client, submit_kwargs)
+    def _with_options(self, **options):
+        return Where(self.where, self.client, self.submit_kwargs, dict(self.options, **options))
+
+    def __call__(self, client=None, **kwargs):
+        options = dict(self.default_options)
+        for key in self.default_options.keys() & kwargs.keys():
+            options[key] = kwargs.pop(key)
+        if options["compression"] is not None:
+            from ._compression import check_compression
+
+            check_compression(options["compression"])
+        return Where(self.where, client, kwargs, options)
 
 
 remotely = Where("remotely")
@@ -1,4 +1,7 @@
+import gc
+import json
 import pickle
+import weakref
 
 import pytest
 from pytest import raises
@@ -113,6 +116,62 @@ def test_pickle():
     assert func._scoped.func.__code__.co_code == func2._scoped.func.__code__.co_code
 
 
+def test_serialize_out_of_band():
+    np = pytest.importorskip("numpy")
+    from dask.distributed.protocol import deserialize, serialize
+
+    # Registered when needed, because dask.distributed is imported lazily
+    import afar._serialize  # noqa
+
+    A = np.arange(100_000)
+    run = afar.run()
+    with run, later:
+        b = A.sum()
+    header, frames = serialize(run._magic_func)
+    assert header["serializer"] == "dask"
+    # The array is sent as its own frame without being copied
+    assert any(np.shares_memory(np.frombuffer(frame, dtype=A.dtype), A) for frame in frames)
+    func2 = deserialize(header, frames)
+    assert func2()["b"] == A.sum()
+
+
+def test_explain():
+    np = pytest.importorskip("numpy")
+
+    with raises(RuntimeError, match="no context to explain"):
+        afar.run().explain()
+    A = np.ones(1000)
+    small = 1
+    run = afar.run(data={"D": np.zeros(10)})
+    with run, later:
+        B = A.sum() + small + D.sum()
+    explanation = run.explain()
+    rows = {row["name"]: row for row in explanation.rows}
+    assert rows.keys() == {"A", "small", "D"}
+    assert explanation.rows[0]["name"] == "A"
+    assert rows["A"]["type"] == "ndarray"
+    assert rows["A"]["how"] == "inline"
+    assert rows["A"]["serialized"] >= A.nbytes
+    assert rows["D"]["how"] == "scatter"
+    assert explanation.total("inline") >= A.nbytes
+    assert "Sent inline" in repr(explanation)
+
+
+def test_magic_explain():
+    pytest.importorskip("IPython")
+    from afar._magic import AfarMagic
+
+    explanation = AfarMagic(shell=None)._run("--explain", "y = x + 1\n", local_ns={"x": 1})
+    assert [row["name"] for row in explanation.rows] == ["x"]
+
+    # Values from `-d` are scattered
+    local_ns = {"mydata": {"x": 1}, "z": 2}
+    explanation = AfarMagic(shell=None)._run("-d mydata --explain", "y = x + z\n", local_ns=local_ns)
+    rows = {row["name"]: row for row in explanation.rows}
+    assert rows["x"]["how"] == "scatter"
+    assert rows["z"]["how"] == "inline"
+
+
 def test_end_of_file():
     data = {}
     end_of_file(data)
@@ -123,3 +182,156 @@ def end_of_file(data):
     with afar.run(data=data), locally:
         x = 10
         y = 2 * x
+
+
+def test_repr_methods_cached(monkeypatch):
+    IPython = pytest.importorskip("IPython")
+    from IPython.core.formatters import DisplayFormatter
+
+    from afar import _reprs
+
+    class FakeShell:
+        display_formatter = DisplayFormatter()
+
+    shell = FakeShell()
+    monkeypatch.setattr(IPython, "get_ipython", lambda: shell)
+    calls = []
+    orig_format = shell.display_formatter.format
+
+    def format(obj, *args, **kwargs):
+        calls.append(obj)
+        return orig_format(obj, *args, **kwargs)
+
+    monkeypatch.setattr(shell.display_formatter, "format", format)
+    methods = _reprs.get_repr_methods()
+    assert "_repr_html_" in methods
+    assert _reprs.get_repr_methods() == methods
+    assert len(calls) == 1
+
+    # Registering a new formatter invalidates the cache
+    shell.display_formatter.formatters["text/html"].for_type(complex, str)
+    assert _reprs.get_repr_methods() == methods
+    assert len(calls) == 2
+    shell.display_formatter.formatters["text/html"].enabled = False
+    assert "_repr_html_" not in _reprs.get_repr_methods()
+    assert len(calls) == 3
+
+
+def test_where_options():
+    from afar._where import Where
+
+    where = afar.remotely(repr_max_size=10, priority=1)
+    assert where.options["repr_max_size"] == 10
+    assert where.submit_kwargs == {"priority": 1}
+    assert afar.remotely.options == Where.default_options
+
+
+def test_repr_max_size():
+    from afar._reprs import repr_afar
+
+    val = list(range(1000))
+    assert repr_afar(val, [], 10_000) == (repr(val), "__repr__", False, False)
+    assert repr_afar(val, [], None) == (repr(val), "__repr__", False, False)
+    text, method_name, is_exception, is_truncated = repr_afar(val, ["_repr_html_"], 100)
+    assert is_truncated
+    assert method_name == "__repr__"
+    assert text.startswith(repr(val)[:100])
+    assert "truncated" in text
+    assert len(text) < 200
+
+
+def test_stats():
+    afar.stats(clear=True)
+    run = afar.run()
+    for _ in range(3):
+        with run, locally:
+            x = 1
+    assert run.data == {"x": 1}
+    assert run.stats.where == "locally"
+    assert {"get_lines", "get_body_start", "get_body", "cadabra", "execute"} <= set(
+        run.stats.client
+    )
+    assert "client.execute" in repr(run.stats)
+    summary = afar.stats()
+    assert summary["client.cadabra"]["count"] == 3
+    info = summary["client.execute"]
+    assert info["min"] <= info["p50"] <= info["p90"] <= info["p99"] <= info["max"]
+    # Only timings are kept for `afar.stats()`, not profile or memory data
+    stats_ref = weakref.ref(run.stats)
+    with run, locally:
+        x = 2
+    gc.collect()
+    assert stats_ref() is None
+    assert afar.stats()["client.cadabra"]["count"] == 4
+    afar.stats(clear=True)
+    assert afar.stats() == {}
+
+
+def test_trace(tmp_path):
+    path = tmp_path / "trace.json"
+    with afar.trace(path) as trace:
+        with afar.run, locally:
+            x = 1
+    with afar.run, locally:
+        x = 2
+    assert len(trace.records) == 1
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    spans = {event["name"] for event in events if event["ph"] == "X"}
+    assert {"get_lines", "cadabra", "execute"} <= spans
+
+
+def test_lazy_imports(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    script = tmp_path / "script.py"
+    script.write_text(
+        "import sys\n"
+        "import afar\n"
+        "assert 'remotely' in dir(afar)\n"
+        "assert afar.__version__\n"
+        "run = afar.run()\n"
+        "with run, afar.locally:\n"
+        "    x = 1\n"
+        "assert run.data['x'] == 1\n"
+        "with run, afar.later:\n"
+        "    y = x + 1\n"
+        "assert 'distributed' not in sys.modules\n"
+    )
+    env = dict(os.environ)
+    path = os.path.dirname(os.path.dirname(afar.__file__))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [path, env.get("PYTHONPATH")]))
+    assert subprocess.run([sys.executable, str(script)], env=env).returncode == 0
+
+
+def test_compression_roundtrip():
+    from afar._compression import Compressed, compress
+
+    data = b"a" * 1_000_000
+    compressed = compress(data, "zlib", 10_000)
+    assert isinstance(compressed, Compressed)
+    assert compressed.nbytes < len(data) / 100
+    assert compressed.unpack() == data
+    assert compress(b"a" * 100, "zlib", 10_000) == b"a" * 100
+
+
+def test_memory_tracker_overlapping():
+    from afar._memory import MemoryTracker, format_report
+
+    with MemoryTracker() as alone:
+        pass
+    assert not alone.report["overlapping"]
+
+    a = MemoryTracker().__enter__()
+    data = bytearray(10_000_000)
+    del data
+    with MemoryTracker() as b:
+        pass
+    a.__exit__(None, None, None)
+    # b doesn't reset the peak that a saw
+    assert a.report["peak_traced"] >= 10_000_000
+    assert a.report["overlapping"]
+    assert b.report["overlapping"]
+    assert "overlapping" in format_report(a.report)
@@ -0,0 +1,96 @@
+"""Enforce upper bounds on the Dask operations afar makes per context.
+
+These catch structural regressions, such as an extra scatter or round trip, that
+benchmarks would only show as noise.  If a change legitimately needs more operations,
+update the budgets below and explain why in the commit.
+"""
+import gc
+from collections import Counter
+
+import pytest
+from dask.distributed import Client
+
+import afar
+from afar._magic import AfarMagic
+
+# Maximum number of each operation for a context that saves ``n`` variables.
+# "messages" counts messages sent to the scheduler over the batched stream, which
+# includes submitting tasks and releasing Futures.
+BUDGETS = {
+    "run": {"scatter": lambda n: 1, "submit": lambda n: 1 + n, "messages": lambda n: 2 + 2 * n},
+    "get": {"scatter": lambda n: 1, "submit": lambda n: 1 + n, "messages": lambda n: 2 + 2 * n},
+    "data": {"scatter": lambda n: 2, "submit": lambda n: 1 + n, "messages": lambda n: 2 + 2 * n},
+    "magic": {"scatter": lambda n: 1, "submit": lambda n: 1 + n, "messages": lambda n: 2 + 2 * n},
+}
+
+
+class OperationCounter:
+    def __init__(self, client, monkeypatch):
+        self.counts = Counter()
+        for name in ["submit", "scatter", "_send_to_scheduler"]:
+            monkeypatch.setattr(client, name, self._wrap(name, getattr(client, name)))
+
+    def _wrap(self, name, func):
+        def wrapper(*args, **kwargs):
+            if name == "_send_to_scheduler":
+                self.counts["messages"] += 1
+                self.counts[f"op:{args[0]['op']}"] += 1
+            else:
+                self.counts[name] += 1
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    def check(self, path, n):
+        for name, budget in BUDGETS[path].items():
+            assert self.counts[name] <= budget(n), (path, name, dict(self.counts))
+        self.counts.clear()
+
+
+@pytest.fixture
+def counter(monkeypatch):
+    client = Client(processes=False, n_workers=1, threads_per_worker=1, dashboard_address=":0")
+    # Warm up so one-time operations, such as subscribing to the afar topic, aren't counted
+    with afar.get, afar.remotely:
+        warmup = 1  # noqa: F841
+    # Release lingering Futures now, so releasing them isn't counted
+    gc.collect()
+    yield OperationCounter(client, monkeypatch)
+    client.close()
+
+
+def test_run_budget(counter):
+    run = afar.run("x", "y")
+    with run, afar.remotely:
+        x = 1
+        y = x + 1  # noqa: F841
+    assert run.data["y"].result() == 2
+    del run
+    counter.check("run", 2)
+
+
+def test_get_budget(counter):
+    with afar.get("x", "y") as results, afar.remotely:
+        x = 1
+        y = x + 1  # noqa: F841
+    assert results["y"] == 2
+    counter.check("get", 2)
+
+
+def test_data_budget(counter):
+    run = afar.run("b", "c", data={"a": 1})
+    with run, afar.remotely:
+        b = a + 1  # noqa: F821
+        c = b + 1  # noqa: F841
+    assert run.data["c"].result() == 3
+    del run
+    counter.check("data", 2)
+
+
+def test_magic_budget(counter):
+    magic = AfarMagic(shell=None)
+    ns = {}
+    magic._run("x, y", "x = 1\ny = x + 1\n", local_ns=ns)
+    assert ns["y"].result() == 2
+    ns.clear()
+    counter.check("magic", 2)
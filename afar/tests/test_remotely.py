@@ -1,8 +1,16 @@
+import gc
+import json
+import os
 import subprocess
 import sys
+import time
+import warnings
+import weakref
 from operator import add
 
+import pytest
 from dask.distributed import Client
+from pytest import raises
 
 import afar
 
@@ -36,3 +44,652 @@ def test_simple():
     with afar.get as results, afar.remotely(priority=1):
         five = two + three
     assert results == {"five": 5}
+
+
+def test_logging(caplog):
+    client = Client()
+    with afar.run, afar.remotely:
+        import logging
+
+        logging.getLogger("afar.test").warning("hello from %s", "afar")
+
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        records = [record for record in caplog.records if record.name == "afar.test"]
+        if records:
+            break
+        time.sleep(0.05)
+    [record] = records
+    assert record.levelname == "WARNING"
+    assert record.getMessage() == "hello from afar"
+    assert record.afar_worker in client.scheduler_info()["workers"]
+
+    # Records are sent while the task is still running
+    run = afar.run()
+    with run, afar.remotely:
+        import logging
+        from time import sleep
+
+        logging.getLogger("afar.test").warning("before sleeping")
+        sleep(3)
+        x = 1
+    deadline = time.time() + 2
+    while time.time() < deadline:
+        if any(record.getMessage() == "before sleeping" for record in caplog.records):
+            break
+        time.sleep(0.05)
+    else:
+        raise AssertionError("log record was not sent while the task was running")
+    assert not run.data["x"].done()
+    assert run.data["x"].result() == 1
+
+
+def test_progress():
+    client = Client()  # noqa
+    run = afar.run()
+    with run, afar.remotely:
+        for i in range(5):
+            afar.progress(i + 1, 5)
+        total = i + 1
+
+    assert run.data["total"].result() == 5
+    deadline = time.time() + 10
+    while not run.progress.done and time.time() < deadline:
+        time.sleep(0.05)
+    assert run.progress.n == 5
+    assert run.progress.total == 5
+    assert run.progress.fraction == 1
+    # No-op when run locally
+    afar.progress(1, 2)
+
+
+def test_full_repr():
+    from afar._reprs import RETURN_VALUE_KEY, FullRepr
+
+    client = Client()
+    val = list(range(1000))
+    remote_dict = client.submit(dict, [(RETURN_VALUE_KEY, val)])
+    full_repr = FullRepr(client, [])
+    full_repr._set_future(remote_dict)
+    full_repr._set_truncated(True)
+    assert repr(full_repr.fetch()) == repr(val)
+    full_repr.release()
+    with raises(RuntimeError, match="no longer available"):
+        full_repr.fetch()
+
+    # The remote value is released right away if the repr wasn't truncated
+    full_repr = FullRepr(client, [])
+    full_repr._set_truncated(False)
+    full_repr._set_future(client.submit(dict, [(RETURN_VALUE_KEY, val)]))
+    assert full_repr._future is None
+
+
+@pytest.mark.parametrize("separate_repr", [False, True])
+def test_display_expr(monkeypatch, capsys, separate_repr):
+    # Pretend we're in IPython so the final expression is displayed
+    monkeypatch.setattr("afar._abra.is_ipython", lambda: True)
+    monkeypatch.setattr("afar._abra.get_repr_methods", lambda: [])
+    client = Client()  # noqa
+    run = afar.run()
+    with run, afar.remotely(separate_repr=separate_repr):
+        x = 41
+        x + 1
+
+    assert run.data["x"].result() == 41
+    deadline = time.time() + 10
+    while run._full_repr.is_truncated is None and time.time() < deadline:
+        time.sleep(0.05)
+    assert run._full_repr.is_truncated is False
+    assert "42" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("raises_error", [False, True])
+def test_display_expr_released_without_repr(monkeypatch, raises_error):
+    monkeypatch.setattr("afar._abra.is_ipython", lambda: True)
+    monkeypatch.setattr("afar._abra.get_repr_methods", lambda: [])
+    client = Client()  # noqa
+    run = afar.run()
+    with run, afar.remotely:
+        x = 1
+        (1 / 0) if raises_error else None
+    assert run._full_repr._future is not None
+    deadline = time.time() + 10
+    while run._full_repr._future is not None and time.time() < deadline:
+        time.sleep(0.05)
+    assert run._full_repr._future is None
+
+
+def test_stats():
+    client = Client()
+    run = afar.run()
+    with run, afar.remotely:
+        x = 1
+    assert run.data["x"].result() == 1
+    deadline = time.time() + 10
+    while "run_afar" not in run.stats.worker and time.time() < deadline:
+        time.sleep(0.05)
+    assert {"bind", "execute", "run_afar"} <= set(run.stats.worker)
+    assert {"cadabra", "scatter_func", "submit"} <= set(run.stats.client)
+    assert run.stats.worker_address in client.scheduler_info()["workers"]
+    assert "worker.execute" in afar.stats()
+
+
+def test_profile(capsys):
+    client = Client()  # noqa
+    run = afar.run()
+    with run, afar.remotely(profile=True, profile_limit=5):
+        x = sum(range(1000))
+    assert run.data["x"].result() == 499500
+    deadline = time.time() + 10
+    while run.profile is None and time.time() < deadline:
+        time.sleep(0.05)
+    assert run.profile.total_calls > 0
+    assert "function calls" in capsys.readouterr().out
+
+
+def test_trace_memory(capsys):
+    client = Client()  # noqa
+    run = afar.run()
+    with run, afar.remotely(trace_memory=True):
+        x = len(bytearray(10_000_000))
+    assert run.data["x"].result() == 10_000_000
+    deadline = time.time() + 10
+    while run.stats.memory is None and time.time() < deadline:
+        time.sleep(0.05)
+    assert run.stats.memory["peak_traced"] >= 10_000_000
+    assert {"rss_before", "rss_after", "rss_delta", "traced_delta"} <= run.stats.memory.keys()
+    assert "afar memory: peak" in capsys.readouterr().out
+
+
+def test_trace(tmp_path):
+    client = Client()
+    trace = afar.trace(tmp_path / "trace.json").start()
+    run = afar.run()
+    with run, afar.remotely:
+        print("hello")
+        x = 1
+    assert run.data["x"].result() == 1
+    deadline = time.time() + 10
+    while "run_afar" not in run.stats.worker and time.time() < deadline:
+        time.sleep(0.05)
+    trace.stop()
+    with open(tmp_path / "trace.json") as f:
+        events = json.load(f)["traceEvents"]
+    names = {event["args"]["name"] for event in events if event["name"] == "process_name"}
+    assert names == {"client", run.stats.worker_address}
+    assert run.stats.worker_address in client.scheduler_info()["workers"]
+    worker_spans = {event["name"] for event in events if event.get("cat") == "worker"}
+    assert {"execute", "run_afar"} <= worker_spans
+    instants = {event["name"] for event in events if event["ph"] == "i"}
+    assert {"begin", "stdout"} <= instants
+
+
+def test_task_keys():
+    from dask.utils import key_split
+
+    client = Client()
+    run = afar.run("x", "y")
+    with run, afar.remotely:
+        x = 1
+        y = x + 1
+    x, y = run.data["x"], run.data["y"]
+    assert y.result() == 2
+    assert key_split(x.key).startswith("get_afar:test_remotely:")
+    assert key_split(x.key).endswith(":x")
+    assert key_split(y.key).endswith(":y")
+
+    def get_annotations(dask_scheduler, key):
+        return dask_scheduler.tasks[key].annotations
+
+    annotations = client.run_on_scheduler(get_annotations, key=y.key)
+    assert list(annotations["afar_names"]) == ["x", "y"]
+    assert annotations["afar_location"].startswith(__file__)
+
+
+def test_lru_data():
+    np = pytest.importorskip("numpy")
+
+    client = Client()
+    spill = {}
+    data = afar.LRUData("1.5 MB", spill=spill)
+    run = afar.run(data=data)
+    with run, afar.remotely:
+        a = np.ones(100_000)  # 800 kB
+    data["a"].result()
+    with run, afar.remotely:
+        b = np.ones(100_000)
+    data["b"].result()
+    assert not spill
+    with run, afar.remotely:
+        c = a.sum()
+    # "a" was used most recently, so "b" is evicted and spilled locally
+    assert list(data) == ["a", "c", "b"]
+    assert isinstance(spill["b"], np.ndarray)
+    assert data.nbytes <= data.max_bytes
+    with run, afar.remotely:
+        d = b.sum()
+    # "b" is scattered again and replaces the spilled value
+    assert "b" not in spill
+    assert data["d"].result() == 100_000
+    assert data["c"].result() == 100_000
+    client.close()
+
+
+def test_liveness():
+    client = Client()
+    with raises(ValueError, match="liveness"):
+        afar.run(liveness="release")
+
+    x = client.submit(add, 1, 1)
+    run = afar.run(data={}, liveness="report")
+    with run, afar.remotely:
+        # Assigning without saving doesn't touch the Future of the outer variable
+        x = 1
+        y = x * 2
+    assert run.data["y"].result() == 2
+    assert x.result() == 2
+    # Futures put in `data` by the user aren't reported
+    run.data["z"] = client.submit(add, 1, 2)
+    with run, afar.remotely:
+        z = 3
+    # The earlier Future is released when it is replaced, even after a context used it
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with run, afar.remotely:
+            t = y + 1
+        assert run.data["t"].result() == 3
+        with run, afar.remotely:
+            y = 4
+    # Report Futures that are still referenced elsewhere
+    first = run.data["y"]
+    with pytest.warns(UserWarning, match="replaced y saved by an earlier context") as record:
+        with run, afar.remotely:
+            y = 5
+    assert record[0].filename == __file__
+    assert run.data["y"].result() == 5
+    assert first.result() == 4
+    # Earlier values that aren't Futures (even unhashable ones) aren't reported
+    run = afar.get(data={}, liveness="report")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        for _ in range(2):
+            with run, afar.remotely:
+                s = {1, 2}
+    assert run.data["s"] == {1, 2}
+    client.close()
+
+
+def test_compression():
+    np = pytest.importorskip("numpy")
+
+    from afar._compression import Compressed, compress
+
+    with raises(ValueError, match="not available"):
+        afar.remotely(compression="not-a-compression")
+
+    zeros = np.zeros(1_000_000)
+    compressed = compress(zeros, "zlib", 10_000)
+    assert isinstance(compressed, Compressed)
+    assert compressed.nbytes < zeros.nbytes / 100
+    np.testing.assert_array_equal(compressed.unpack(), zeros)
+    # Small and incompressible values are left alone
+    assert compress(1, "zlib", 10_000) == 1
+    random = np.random.random(100_000)
+    assert compress(random, "zlib", 10_000) is random
+
+    client = Client()
+    run = afar.run(data={"A": np.ones(1_000_000)})
+    B = np.zeros(1_000_000)
+    with run, afar.remotely(compression="zlib"):
+        C = A.sum() + B.sum()
+    assert run.data["C"].result() == 1_000_000
+    assert run.data["A"].result().sum() == 1_000_000
+    assert "compress_func" in run.stats.client
+    assert "compress_data" in run.stats.client
+    deadline = time.time() + 5
+    while "decompress" not in run.stats.worker and time.time() < deadline:
+        time.sleep(0.01)
+    assert "decompress" in run.stats.worker
+    client.close()
+
+
+def test_shared_memory():
+    np = pytest.importorskip("numpy")
+
+    from afar._shared_memory import _shared_dir, is_same_host
+
+    client = Client()
+    assert is_same_host(client)
+    A = np.arange(1_000_000)
+    run = afar.run("kind", "total", "B")
+    with run, afar.remotely(shared_memory=True):
+        kind = type(A).__name__
+        A[0] = 10  # copy-on-write
+        total = A.sum()
+        B = A
+    assert run.data["kind"].result() == "memmap"
+    assert run.data["total"].result() == A.sum() + 10
+    np.testing.assert_array_equal(run.data["B"].result()[1:], A[1:])
+    assert A[0] == 0
+    assert "share_memory" in run.stats.client
+    # Files are removed once workers have the data
+    assert not [name for name in os.listdir(_shared_dir()) if name.startswith("afar-")]
+    client.close()
+
+    client = Client(processes=False)
+    assert not is_same_host(client)
+    client.close()
+
+
+def test_remove_shared_files(monkeypatch, tmp_path):
+    from afar import _shared_memory
+
+    path = tmp_path / "afar-shared"
+    path.write_bytes(b"x")
+    remove = os.remove
+
+    def mapped(path):
+        raise PermissionError(path)
+
+    # Files that are still in use (such as on Windows) are removed later
+    monkeypatch.setattr(os, "remove", mapped)
+    _shared_memory.remove_files([str(path)])
+    assert path.exists()
+    monkeypatch.setattr(os, "remove", remove)
+    _shared_memory.remove_files([])
+    assert not path.exists()
+    assert not _shared_memory._pending_removal
+
+
+def test_delta_transfer():
+    np = pytest.importorskip("numpy")
+
+    from afar._delta import BLOCK_BYTES, MIN_BYTES
+
+    client = Client()
+    A = np.arange(MIN_BYTES // 8, dtype=np.int64)
+    run = afar.run("total", data={"A": A})
+    with run, afar.remotely(delta_transfer=True):
+        total = A.sum()
+    assert run.data["total"].result() == A.sum()
+    first = run.data["A"]
+    assert first.key.startswith("ndarray-")
+
+    # Change one block; only that block is sent and patched on the cluster
+    A2 = A.copy()
+    A2[BLOCK_BYTES // 8 + 1] = -1
+    run.data["A"] = A2
+    with run, afar.remotely(delta_transfer=True):
+        total = A.sum()
+    assert run.data["total"].result() == A2.sum()
+    assert run.data["A"].key.startswith("patch_array-")
+    np.testing.assert_array_equal(run.data["A"].result(), A2)
+    np.testing.assert_array_equal(first.result(), A)
+
+    # Unchanged values reuse the previous Future
+    patched = run.data["A"]
+    run.data["A"] = A2.copy()
+    with run, afar.remotely(delta_transfer=True):
+        total = A.sum()
+    assert run.data["A"] is patched
+    assert "delta" in run.stats.client
+
+    # Different shapes are scattered as usual
+    run.data["A"] = A2[:-1].copy()
+    with run, afar.remotely(delta_transfer=True):
+        total = A.sum()
+    assert run.data["A"].key.startswith("ndarray-")
+    assert run.data["total"].result() == A2[:-1].sum()
+
+    # Futures removed from `data` or replaced by other Futures aren't kept
+    ref = weakref.ref(run.data["A"])
+    del run.data["A"]
+    with run, afar.remotely:
+        total = 1
+    gc.collect()
+    assert ref() is None
+    assert not run._delta_cache._entries
+    run.data["A"] = A
+    with run, afar.remotely(delta_transfer=True):
+        total = A.sum()
+    assert "A" in run._delta_cache._entries
+    run.data["A"] = client.submit(np.ones, 10)
+    with run, afar.remotely:
+        total = 1
+    assert not run._delta_cache._entries
+
+    # `run("name")` shares the cache of `run`, since it shares `data`
+    run.data["A"] = A
+    with run("total"), afar.remotely(delta_transfer=True):
+        total = A.sum()
+    run.data["A"] = A2
+    with run("total"), afar.remotely(delta_transfer=True):
+        total = A.sum()
+    assert run.data["A"].key.startswith("patch_array-")
+    assert run.data["total"].result() == A2.sum()
+    client.close()
+
+
+def test_lazy(monkeypatch):
+    np = pytest.importorskip("numpy")
+
+    import afar._lazy
+    from afar._core import Run
+    from afar._lazy import LazyValue, make_lazy
+
+    requested = []
+    send_lazy = afar._lazy.send_lazy
+
+    def record_send_lazy(client, value, variable_name):
+        requested.append(variable_name)
+        return send_lazy(client, value, variable_name)
+
+    monkeypatch.setattr(afar._lazy, "send_lazy", record_send_lazy)
+    client = Client()
+    A = np.ones(1_000_000)
+    small = 2
+    use_A = False
+    run = afar.run("x")
+    with run, afar.remotely(lazy=True):
+        if use_A:
+            x = A.sum() * small
+        else:
+            x = small
+    assert run.data["x"].result() == 2
+    assert not requested
+    assert "lazy" in run.stats.client
+
+    use_A = True
+    with run, afar.remotely(lazy=True):
+        if use_A:
+            x = A.sum() * small
+        else:
+            x = small
+        y = [A[0] for i in range(3)]  # only fetched once
+    assert run.data["x"].result() == 2_000_000
+    assert len(requested) == 1
+
+    run = afar.run("B")
+    with run, afar.remotely(lazy=True):
+        B = A
+    np.testing.assert_array_equal(run.data["B"].result(), A)
+
+    magic_func = run._magic_func
+    lazy_func, values = make_lazy(magic_func, 1000)
+    assert values.keys() == {"A"}
+    assert isinstance(lazy_func._scoped.outer_scope["A"], LazyValue)
+    assert magic_func._scoped.outer_scope["A"] is A
+
+    # The worker gives up if the client never sends the value
+    async def ignore(client, value, variable_name):
+        pass
+
+    monkeypatch.setattr(afar._lazy, "send_lazy", ignore)
+    run = afar.run("x")
+    with run, afar.remotely(lazy=True, lazy_timeout=0.5):
+        x = A.sum()
+    with raises(TimeoutError, match="'A' from the client"):
+        run.data["x"].result()
+
+    # Values are forgotten when the contexts are done
+    start = time.time()
+    while Run._lazy_values:
+        assert time.time() - start < 5
+        time.sleep(0.01)
+    client.close()
+
+
+def test_preload():
+    from afar._abra import imported_modules
+
+    def f():
+        import os.path
+        from collections import abc  # noqa
+
+        def g():
+            import csv  # noqa
+
+        return os.path
+
+    assert imported_modules(f) == ["os.path", "collections", "csv"]
+
+    client = Client()
+    preloaded = afar.preload("json", "afar_no_such_module", client=client)
+    assert preloaded == {"json", "afar_no_such_module"}
+
+    def get_imported(dask_worker):
+        return dask_worker.plugins["afar-preload"].imported
+
+    for imported in client.run(get_imported).values():
+        assert imported == ["json"]
+
+    run = afar.run("x")
+    with run, afar.remotely(preload_imports=True):
+        import csv
+
+        x = csv.__name__
+    assert run.data["x"].result() == "csv"
+    assert "preload" in run.stats.client
+    assert afar.preload(client=client) == {"json", "afar_no_such_module", "csv"}
+    for imported in client.run(get_imported).values():
+        assert imported == ["csv", "json"]
+    client.close()
+
+
+def test_upload_modules(tmp_path, monkeypatch):
+    import importlib
+    import importlib.util
+    import json
+
+    import afar._upload
+    from afar._upload import local_modules
+
+    client = Client()
+    (tmp_path / "afar_test_helper.py").write_text("import afar_test_helper2\nVALUE = 1\n")
+    (tmp_path / "afar_test_helper2.py").write_text("def double(x):\n    return 2 * x\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import afar_test_helper
+    import afar_test_helper2
+
+    double = afar_test_helper2.double
+    assert local_modules([afar_test_helper, json, 1]) == {
+        "afar_test_helper": str((tmp_path / "afar_test_helper.py").resolve()),
+        "afar_test_helper2": str((tmp_path / "afar_test_helper2.py").resolve()),
+    }
+    # Dependencies are first
+    assert list(local_modules([afar_test_helper])) == ["afar_test_helper2", "afar_test_helper"]
+    assert local_modules([double]).keys() == {"afar_test_helper2"}
+
+    run = afar.run("x")
+    # Workers can't import the modules to unpickle the function
+    with raises(Exception, match="No module named 'afar_test_helper"):
+        with run, afar.remotely:
+            x = double(afar_test_helper.VALUE)
+
+    with run, afar.remotely(upload_modules=True):
+        x = double(afar_test_helper.VALUE)
+    assert run.data["x"].result() == 2
+    assert "upload_modules" in run.stats.client
+
+    # Only upload again if the file changes
+    register_worker_plugin = afar._upload.register_worker_plugin
+    uploads = []
+
+    def record_register_worker_plugin(client, plugin, name):
+        uploads.append(plugin.filename)
+        return register_worker_plugin(client, plugin, name)
+
+    monkeypatch.setattr(afar._upload, "register_worker_plugin", record_register_worker_plugin)
+    with run, afar.remotely(upload_modules=True):
+        x = double(afar_test_helper.VALUE)
+    assert run.data["x"].result() == 2
+    assert uploads == []
+
+    (tmp_path / "afar_test_helper.py").write_text("import afar_test_helper2\nVALUE = 10\n")
+    importlib.reload(afar_test_helper)
+    with run, afar.remotely(upload_modules=True):
+        x = double(afar_test_helper.VALUE)
+    assert run.data["x"].result() == 20
+    assert uploads == ["afar_test_helper.py"]
+
+    # A different module with the same file name would overwrite it on the workers
+    (tmp_path / "other").mkdir()
+    other_path = tmp_path / "other" / "afar_test_helper.py"
+    other_path.write_text("VALUE = 100\n")
+    spec = importlib.util.spec_from_file_location("afar_test_helper", other_path)
+    other = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(other)
+    with raises(ValueError, match="same file name"):
+        with run, afar.remotely(upload_modules=True):
+            x = other.VALUE
+    client.close()
+    del sys.modules["afar_test_helper"]
+    del sys.modules["afar_test_helper2"]
+
+
+def test_arrow():
+    pd = pytest.importorskip("pandas")
+    pa = pytest.importorskip("pyarrow")
+    import pickle
+
+    from afar._arrow import ArrowData, to_arrow
+
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]}, index=[10, 20, 30])
+    arrow_data = to_arrow(df)
+    assert isinstance(arrow_data, ArrowData)
+    pd.testing.assert_frame_equal(pickle.loads(pickle.dumps(arrow_data, protocol=5)).unpack(), df)
+    pd.testing.assert_frame_equal(pickle.loads(pickle.dumps(arrow_data, protocol=4)).unpack(), df)
+    table = pa.table({"a": [1, 2]})
+    assert to_arrow(table).unpack().equals(table)
+    assert to_arrow([1, 2]) is None
+    # Arrow can't represent mixed types, so send as usual
+    assert to_arrow(pd.DataFrame({"a": [1, "x"]})) is None
+
+    client = Client()
+    run = afar.run("total", "kind", data={"df2": df * 2})
+    with run, afar.remotely(arrow=True):
+        kind = type(df).__name__
+        total = df["a"].sum() + df2["a"].sum()
+    assert run.data["kind"].result() == "DataFrame"
+    assert run.data["total"].result() == 18
+    pd.testing.assert_frame_equal(run.data["df2"].result(), df * 2)
+    assert "arrow_func" in run.stats.client
+    assert "arrow_data" in run.stats.client
+    client.close()
+
+
+def test_explain():
+    np = pytest.importorskip("numpy")
+
+    client = Client()
+    A = client.submit(np.ones, 1000)
+    A.result()
+    run = afar.run(data={"C": 2})
+    with run, afar.remotely:
+        B = A.sum() * C
+    assert run.data["B"].result() == 2000
+    rows = {row["name"]: row for row in run.explain().rows}
+    assert rows["A"]["how"] == "future"
+    assert rows["A"]["sizeof"] >= 8000
+    # "C" was scattered, so it's now a Future
+    assert rows["C"]["how"] == "future"
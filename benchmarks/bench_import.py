@@ -0,0 +1,17 @@
+"""Benchmarks of how long importing afar takes in a fresh process.
+
+``dask.distributed`` is slow to import, so it should only be imported once a
+``remotely`` context needs a client.
+"""
+
+
+class ImportTime:
+    def timeraw_import_afar(self):
+        return "import afar"
+
+    def timeraw_import_run(self):
+        return "import afar; afar.run, afar.locally, afar.later"
+
+    def timeraw_import_distributed(self):
+        # For comparison; this imports dask.distributed
+        return "import afar; import afar._compression"
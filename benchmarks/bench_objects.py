@@ -0,0 +1,62 @@
+"""Benchmarks of the size of afar's per-context objects.
+
+``MagicFunction`` is pickled for every submission, so its pickled size is bytes on
+the wire, and ``Run`` is created for every ``afar.run(...)``.
+"""
+import pickle
+import tracemalloc
+
+import afar
+from afar._abra import cadabra
+
+from .common import make_body
+
+
+def _allocated(func, number=1000):
+    """Average bytes allocated by each call to func"""
+    objs = []
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(number):
+            objs.append(func())
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / number
+
+
+class CreateRun:
+    def time_run_call(self):
+        afar.run("x", data={})
+
+    def track_run_call_bytes(self):
+        return _allocated(lambda: afar.run("x", data={}))
+
+    track_run_call_bytes.unit = "bytes"
+
+    def track_remotely_call_bytes(self):
+        return _allocated(lambda: afar.remotely(priority=1))
+
+    track_remotely_call_bytes.unit = "bytes"
+
+
+class PickleMagicFunction:
+    params = [1, 10, 100]
+    param_names = ["num_lines"]
+
+    def setup(self, num_lines):
+        body = [f"    {line}\n" for line in make_body(num_lines).splitlines()]
+        self.magic_func, _, _ = cadabra(body, "remotely", (), {}, {}, {})
+        self.pickled = pickle.dumps(self.magic_func)
+
+    def time_dumps(self, num_lines):
+        pickle.dumps(self.magic_func)
+
+    def time_loads(self, num_lines):
+        pickle.loads(self.pickled)
+
+    def track_pickled_bytes(self, num_lines):
+        return len(self.pickled)
+
+    track_pickled_bytes.unit = "bytes"
@@ -0,0 +1,104 @@
+"""Benchmarks of the overhead of afar on the client and end-to-end latency.
+
+Run with ``asv run`` or ``asv dev`` from the root of the repository.
+"""
+import afar
+
+from .common import ClusterMixin, make_body, make_context, wait
+
+
+class BodyLength:
+    params = [1, 10, 100, 1000]
+    param_names = ["num_lines"]
+
+    def setup(self, num_lines):
+        self.context = make_context(make_body(num_lines))
+
+    def time_locally(self, num_lines):
+        self.context(afar.locally)
+
+    def time_later(self, num_lines):
+        self.context(afar.later)
+
+
+class BodyLengthRemotely(ClusterMixin):
+    params = [1, 10, 100, 1000]
+    param_names = ["num_lines"]
+
+    def setup(self, num_lines):
+        self.setup_cluster()
+        self.context = make_context(make_body(num_lines))
+
+    def time_submit(self, num_lines):
+        self.context(afar.remotely)
+
+    def time_end_to_end(self, num_lines):
+        wait(self.context(afar.remotely))
+
+
+class CapturedVariables(ClusterMixin):
+    params = [0, 10, 100]
+    param_names = ["num_captured"]
+
+    def setup(self, num_captured):
+        self.setup_cluster()
+        namespace = {f"v{i}": i for i in range(num_captured)}
+        body = " + ".join(["0"] + list(namespace))
+        self.context = make_context(f"x = {body}", namespace=namespace)
+
+    def time_locally(self, num_captured):
+        self.context(afar.locally)
+
+    def time_submit(self, num_captured):
+        self.context(afar.remotely)
+
+    def time_end_to_end(self, num_captured):
+        wait(self.context(afar.remotely))
+
+
+class ReturnedNames(ClusterMixin):
+    params = [1, 10, 100]
+    param_names = ["num_names"]
+
+    def setup(self, num_names):
+        self.setup_cluster()
+        names = [f"x{i}" for i in range(num_names)]
+        self.context = make_context(make_body(num_names), names=names)
+        self.get_context = make_context(make_body(num_names), names=names, runner="afar.get")
+
+    def time_run(self, num_names):
+        wait(self.context(afar.remotely))
+
+    def time_get(self, num_names):
+        self.get_context(afar.remotely)
+
+
+class PrintVolume(ClusterMixin):
+    params = [0, 10, 1000]
+    param_names = ["num_prints"]
+
+    def setup(self, num_prints):
+        self.setup_cluster()
+        body = f"for i in range({num_prints}):\n    print(i)\nx = 1"
+        self.context = make_context(body)
+
+    def time_end_to_end(self, num_prints):
+        wait(self.context(afar.remotely))
+
+
+class PayloadSize(ClusterMixin):
+    params = [10**3, 10**6, 10**8]
+    param_names = ["nbytes"]
+
+    def setup(self, nbytes):
+        self.setup_cluster()
+        self.payload = b"x" * nbytes
+        self.context = make_context("x = len(payload)", namespace={"payload": self.payload})
+        self.data_context = make_context("x = len(payload)")
+
+    def time_captured(self, nbytes):
+        wait(self.context(afar.remotely))
+
+    def time_data(self, nbytes):
+        # Values in `data` are scattered
+        wait(self.data_context(afar.remotely, data={"payload": self.payload}))
@@ -0,0 +1,41 @@
+"""Benchmarks of sending pandas DataFrames with pickle versus Arrow IPC (``arrow=True``)."""
+import pickle
+
+from afar._arrow import to_arrow
+
+
+class WideDataFrame:
+    params = [[10, 100, 1000], ["pickle", "arrow"]]
+    param_names = ["num_columns", "method"]
+
+    def setup(self, num_columns, method):
+        try:
+            import numpy as np
+            import pandas as pd
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise NotImplementedError("requires numpy, pandas, and pyarrow")
+        rng = np.random.default_rng(0)
+        columns = {}
+        for i in range(num_columns):
+            if i % 2:
+                columns[f"c{i}"] = rng.random(10_000)
+            else:
+                columns[f"c{i}"] = rng.integers(0, 100, 10_000).astype(str)
+        self.df = pd.DataFrame(columns)
+        if method == "arrow":
+            self.dumps = lambda df: pickle.dumps(to_arrow(df), protocol=5)
+            self.loads = lambda data: pickle.loads(data).unpack()
+        else:
+            self.dumps = lambda df: pickle.dumps(df, protocol=5)
+            self.loads = pickle.loads
+        self.data = self.dumps(self.df)
+
+    def time_dumps(self, num_columns, method):
+        self.dumps(self.df)
+
+    def time_loads(self, num_columns, method):
+        self.loads(self.data)
+
+    def time_roundtrip(self, num_columns, method):
+        self.loads(self.dumps(self.df))
@@ -0,0 +1,73 @@
+"""Helpers to create afar contexts of various shapes for benchmarking.
+
+afar needs the source code of a context, so we generate the source, register it
+with ``linecache`` (as IPython does for notebook cells), and compile it.
+"""
+import linecache
+from itertools import count
+from textwrap import indent
+
+from dask.distributed import Client, LocalCluster
+
+import afar
+
+_counter = count()
+
+
+def make_context(body, *, names=(), runner="afar.run", namespace=None):
+    """Create a function that runs ``body`` in ``with {runner}(*names), where:``
+
+    The returned function accepts ``where`` and, optionally, ``data``.  Variables in
+    ``namespace`` are available to the body as globals (i.e., they get captured).
+    """
+    args = "".join(f"{name!r}, " for name in names)
+    source = (
+        "def bench_context(where, data=None):\n"
+        f"    with {runner}({args}data=data) as results, where:\n"
+        f"{indent(body, '        ')}\n"
+        "    return results\n"
+    )
+    filename = f"<afar-benchmark-{next(_counter)}>"
+    lines = source.splitlines(keepends=True)
+    linecache.cache[filename] = (len(source), None, lines, filename)
+    globals_dict = {"afar": afar}
+    if namespace:
+        globals_dict.update(namespace)
+    exec(compile(source, filename, "exec"), globals_dict)
+    return globals_dict["bench_context"]
+
+
+def make_body(num_lines):
+    lines = ["x0 = 0"]
+    lines.extend(f"x{i} = x{i - 1} + 1" for i in range(1, num_lines))
+    return "\n".join(lines)
+
+
+class ClusterMixin:
+    """Create an in-process LocalCluster and Client for each benchmark.
+
+    Call ``setup_cluster`` from ``setup``.  asv runs ``setup`` and ``teardown`` around
+    each benchmark and parameter combination, so the cluster isn't shared between them.
+    Startup isn't timed, and it can't be shared with ``setup_cache``, whose result asv
+    pickles to disk.
+    """
+
+    def setup_cluster(self):
+        self.cluster = LocalCluster(
+            n_workers=1,
+            threads_per_worker=1,
+            processes=False,
+            dashboard_address=":0",
+        )
+        self.client = Client(self.cluster, set_as_default=True)
+
+    def teardown(self, *args):
+        self.client.close()
+        self.cluster.close()
+
+
+def wait(results):
+    """Wait for all Futures in the results of a context"""
+    for val in results.values():
+        if hasattr(val, "result"):
+            val.result()
@@ -16,7 +16,7 @@ setup(
     author="Erik Welch",
     author_email="erik.n.welch@gmail.com",
     url="https://github.com/eriknw/afar",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     license="BSD",
     python_requires=">=3.7",
     setup_requires=[],